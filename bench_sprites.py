@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+#     "numpy>=1.24.0",
+# ]
+# ///
+"""
+Benchmark the sprite processing pipeline on synthetic raw sheets.
+- Synthesizes 4x2 raw sheets at 1K/2K/4K on the charcoal #2d2d2d background
+  (fixed seed, so every run and every machine sees the same pixels)
+- Times remove_charcoal_background per frame, whole-sheet keying, and
+  process_sprite_sheet end to end
+- Compares medians against a stored baseline and exits 1 on regressions
+
+Usage:
+    bench_sprites.py [--sizes 1K,2K,4K] [--repeat 5]
+    bench_sprites.py --save-baseline          # record this machine's numbers
+    bench_sprites.py --tolerance 0.25         # allowed slowdown vs baseline
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from PIL import Image, ImageDraw
+import numpy as np
+
+from process_sprite import key_charcoal_background, load_rgba_array, process_sprite_sheet, remove_charcoal_background
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_baseline.json"
+SEED = 2816
+
+# Raw sheet sizes as the generator produces them (4x2 grid)
+SIZES = {
+    "1K": (1408, 768),
+    "2K": (2816, 1536),
+    "4K": (5632, 3072),
+}
+
+def synthesize_raw_sheet(width: int, height: int, seed: int = SEED) -> Image.Image:
+    """Draw one player-ish figure eight times, with shadows, on a slightly noisy charcoal grid."""
+    rng = np.random.default_rng(seed)
+    data = np.full((height, width, 3), 0x2d, dtype=np.int16)
+    data += rng.integers(-3, 4, size=(height, width, 1), dtype=np.int16)
+    img = Image.fromarray(data.clip(0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(img)
+    cell_w, cell_h = width // 4, height // 2
+    # Same outfit in every frame, like a real generation of one character
+    body = tuple(int(c) for c in rng.integers(90, 255, 3))
+    for row in range(2):
+        for col in range(4):
+            x0, y0 = col * cell_w, row * cell_h
+            cx = x0 + cell_w // 2 + int(rng.integers(-cell_w // 10, cell_w // 10))
+            # Ground shadow, body, head, racket
+            draw.ellipse((cx - cell_w // 5, y0 + cell_h * 0.82, cx + cell_w // 5, y0 + cell_h * 0.9), fill=(20, 20, 20))
+            draw.rectangle((cx - cell_w // 10, y0 + cell_h * 0.35, cx + cell_w // 10, y0 + cell_h * 0.8), fill=body)
+            draw.ellipse((cx - cell_w // 14, y0 + cell_h * 0.2, cx + cell_w // 14, y0 + cell_h * 0.35), fill=(224, 172, 105))
+            rx = cx + int(rng.integers(cell_w // 8, cell_w // 4))
+            draw.ellipse((rx, y0 + cell_h * 0.3, rx + cell_w // 8, y0 + cell_h * 0.45), outline=(230, 230, 230), width=max(2, cell_w // 100))
+    return img
+
+def time_call(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        # Keep process_sprite_sheet's per-sheet prints out of the report
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            ok = fn()
+            timings.append(time.perf_counter() - start)
+        if ok is False:
+            raise RuntimeError("benchmarked call reported failure; timings would be meaningless")
+    return timings
+
+def run_benchmarks(sizes: list[str], repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for label in sizes:
+            width, height = SIZES[label]
+            raw = synthesize_raw_sheet(width, height)
+            raw_path = tmp / f"bench-{label}-raw.png"
+            raw.save(raw_path)
+            frame = raw.crop((0, 0, width // 4, height // 2))
+
+            benches = {
+                "remove_charcoal_background": lambda: remove_charcoal_background(frame),
+                "key_charcoal_background": lambda: key_charcoal_background(load_rgba_array(raw)),
+                "process_sprite_sheet": lambda: process_sprite_sheet(str(raw_path), str(tmp / f"bench-{label}.png")),
+            }
+            for name, fn in benches.items():
+                timings = time_call(fn, repeat)
+                results[f"{name}[{label}]"] = {
+                    "median_s": statistics.median(timings),
+                    "min_s": min(timings),
+                    "repeat": repeat,
+                }
+    return results
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a line per benchmark whose median is slower than baseline × (1 + tolerance)."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base["median_s"] * (1 + tolerance)
+        if stats["median_s"] > limit:
+            regressions.append(f"{name}: {stats['median_s'] * 1000:.1f}ms vs baseline "
+                               f"{base['median_s'] * 1000:.1f}ms (+{(stats['median_s'] / base['median_s'] - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark process_sprite.py on synthetic raw sheets.")
+    parser.add_argument("--sizes", default="1K,2K,4K", help="comma-separated sheet sizes (default: 1K,2K,4K)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark (default: 5)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional slowdown before failing (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip().upper() for s in args.sizes.split(",")]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)} (choose from {', '.join(SIZES)})")
+
+    print(f"Benchmarking sizes {', '.join(sizes)}, {args.repeat} runs each (seed {SEED})")
+    results = run_benchmarks(sizes, args.repeat)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    print(f"\n{'benchmark':<42} {'median':>10} {'min':>10} {'baseline':>10}")
+    for name, stats in results.items():
+        base = baseline.get(name, {}).get("median_s")
+        base_text = f"{base * 1000:8.1f}ms" if base else "         -"
+        print(f"{name:<42} {stats['median_s'] * 1000:8.1f}ms {stats['min_s'] * 1000:8.1f}ms {base_text}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ PERFORMANCE REGRESSION (> {args.tolerance * 100:.0f}% slower than baseline):", file=sys.stderr)
+        for line in regressions:
+            print(f"  - {line}", file=sys.stderr)
+        return 1
+    print(f"\n✓ All benchmarks within {args.tolerance * 100:.0f}% of baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
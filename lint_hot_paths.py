@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Flag per-frame work in requestAnimationFrame loops.
+
+Every function handed to requestAnimationFrame is a root. From each root
+the linter follows calls to functions defined in the given sources (plain
+calls and method calls, matched by name) and reports, at the exact line,
+anything in that per-frame code that is expensive to repeat 60 times a
+second:
+- dom-query     getElementById / querySelector / safeGetElement lookups
+- layout-read   getBoundingClientRect, getComputedStyle, offset*/client* reads
+- dom-write     classList changes and innerHTML writes (style recalc)
+- dom-create    createElement / cloneNode
+- allocation    object and array literals, new, map/filter/slice/...
+- array-scan    O(n) array ops: shift, splice, indexOf, includes, find, ...
+
+Callbacks passed to setTimeout, addEventListener, promises and nested
+requestAnimationFrame calls run later, not in the current frame, so their
+bodies are not charged to the enclosing function. Branches are not
+evaluated, so work that only runs when a point ends (endMatch and friends)
+is reported too; a finding can be accepted with a "hot-path-ok" comment on
+its line.
+
+Output is one "file:line:col: rule: message" line per finding, for CI. The
+exit status is 1 when anything is flagged unless --exit-zero is given.
+
+Usage:
+    lint_hot_paths.py
+    lint_hot_paths.py game.js minigames.js --rules dom-query,layout-read
+"""
+
+import argparse
+import bisect
+import re
+import sys
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+IDENT = r"[A-Za-z_$][\w$]*"
+KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with", "else", "do", "try",
+            "typeof", "new", "delete", "void", "in", "of", "await", "yield", "super", "constructor"}
+# Callees whose function arguments run later, outside the current frame
+DEFERRED_CALLEES = {"setTimeout", "setInterval", "addEventListener", "then", "catch", "finally", "Promise",
+                    "requestAnimationFrame", "requestIdleCallback", "queueMicrotask"}
+SUPPRESS = "hot-path-ok"
+
+DOM_QUERY_CALLS = ["getElementById", "querySelector", "querySelectorAll", "getElementsByClassName",
+                   "getElementsByTagName", "getElementsByName", "safeGetElement"]
+RULES = {
+    "dom-query": re.compile(rf"\b(?:{'|'.join(DOM_QUERY_CALLS)})\s*\("),
+    "layout-read": re.compile(r"\b(?:getBoundingClientRect|getComputedStyle|getClientRects)\s*\("
+                              r"|\.(?:offset|client|scroll)(?:Width|Height|Top|Left)\b(?!\s*=[^=])"),
+    "dom-write": re.compile(r"\.classList\.(?:add|remove|toggle|replace)\s*\(|\.innerHTML\s*\+?=(?!=)"),
+    "dom-create": re.compile(r"\b(?:createElement|createElementNS|cloneNode)\s*\("),
+    "allocation": re.compile(r"\bnew\s+" + IDENT
+                             + r"|(?:[=(,:?\[]|\breturn)\s*[{\[]"
+                             + r"|\.(?:map|filter|slice|concat|flat|flatMap|split)\s*\("
+                             + r"|\b(?:Array\.from|Object\.(?:keys|values|entries|assign))\s*\("),
+    "array-scan": re.compile(r"\.(?:shift|unshift|splice|indexOf|lastIndexOf|includes|find|findIndex|"
+                             r"some|every|reduce|sort|reverse)\s*\("),
+}
+
+FUNCTION_RE = re.compile(
+    rf"\bfunction\s*\*?\s*(?P<decl>{IDENT})?\s*\([^()]*\)\s*\{{"
+    rf"|(?P<assigned>{IDENT})\s*[:=]\s*(?:async\s+)?(?:function\s*\*?\s*(?:{IDENT})?\s*\([^()]*\)|\([^()]*\)\s*=>|{IDENT}\s*=>)\s*\{{"
+    rf"|(?:async\s+)?(?:\([^()]*\)|{IDENT})\s*=>\s*\{{"
+    rf"|^[ \t]*(?:static\s+|async\s+|get\s+|set\s+)*(?P<method>{IDENT})\s*\([^()]*\)\s*\{{", re.M)
+CALL_RE = re.compile(rf"(?<![\w$])({IDENT})\s*\(|\.({IDENT})\s*\(")
+RAF_RE = re.compile(r"\brequestAnimationFrame\s*\(")
+RAF_TARGET_RE = re.compile(rf"\s*(?:this\.)?({IDENT})(?:\.bind\s*\([^()]*\))?\s*\)")
+
+def blank_js(text: str) -> str:
+    """Replace comments, strings, template text and regex literals with spaces, keeping offsets.
+
+    Code inside template ${...} substitutions is kept, since it runs.
+    """
+    out = list(text)
+    n = len(text)
+    last = ""      # last significant character, to tell a regex literal from a division
+    templates = [] # brace depth inside each open ${...}
+
+    def blank(start: int, end: int):
+        for j in range(start, end):
+            if out[j] != "\n":
+                out[j] = " "
+
+    def template_text(i: int) -> int:
+        """Blank template text from i; return where code resumes (after ` or ${)."""
+        start = i
+        while i < n:
+            if text[i] == "\\":
+                i += 2
+            elif text[i] == "`":
+                blank(start, i)
+                return i + 1
+            elif text.startswith("${", i):
+                blank(start, i + 2)
+                templates.append(0)
+                return i + 2
+            else:
+                i += 1
+        blank(start, n)
+        return n
+
+    i = 0
+    while i < n:
+        c = text[i]
+        if c == "}" and templates:
+            if templates[-1] == 0:
+                # End of a ${...} substitution: back to the template's text
+                templates.pop()
+                out[i] = " "
+                i = template_text(i + 1)
+                last = "`"
+                continue
+            templates[-1] -= 1
+        elif c == "{" and templates:
+            templates[-1] += 1
+
+        if c == "`":
+            i = template_text(i + 1)
+            last = "`"
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            end = n if end == -1 else end
+            blank(i, end)
+            i = end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            blank(i, end)
+            i = end
+        elif c in "'\"" or (c == "/" and (not last or last in "(,=:[!&|?{};+-*%<>~^")):
+            end = i + 1
+            in_class = False
+            while end < n:
+                ch = text[end]
+                if ch == "\\":
+                    end += 2
+                    continue
+                if c == "/" and ch == "[":
+                    in_class = True
+                elif c == "/" and ch == "]":
+                    in_class = False
+                elif ch == c and not in_class:
+                    break
+                elif ch == "\n":
+                    break
+                end += 1
+            end = min(end + 1, n)
+            # Keep the delimiters so the code around still parses the same way
+            blank(i + 1, end - 1)
+            last = c
+            i = end
+        else:
+            if not c.isspace():
+                last = c
+            i += 1
+    return "".join(out)
+
+def matching_braces(code: str) -> dict[int, int]:
+    pairs, stack = {}, []
+    for i, c in enumerate(code):
+        if c == "{":
+            stack.append(i)
+        elif c == "}" and stack:
+            pairs[stack.pop()] = i
+    return pairs
+
+def enclosing_callee(code: str, pos: int) -> str | None:
+    """Name of the call whose argument list contains pos, if any."""
+    depth = 0
+    for i in range(pos - 1, -1, -1):
+        c = code[i]
+        if c == ")":
+            depth += 1
+        elif c == "(":
+            if depth == 0:
+                m = re.search(rf"({IDENT})\s*$", code[max(0, i - 80):i])
+                return m.group(1) if m else None
+            depth -= 1
+        elif c in "{};" and depth == 0:
+            return None
+    return None
+
+@dataclass
+class Function:
+    path: Path
+    name: str | None
+    line: int
+    head: int   # where the definition starts, name included
+    start: int  # body braces
+    end: int
+    deferred: bool
+    excluded: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return self.name or f"<anonymous@{self.path.name}:{self.line}>"
+
+    def own_matches(self, pattern: re.Pattern, code: str):
+        """Matches in this function's body that aren't inside a nested named or deferred function."""
+        for m in pattern.finditer(code, self.start, self.end):
+            if not any(s <= m.start() < e for s, e in self.excluded):
+                yield m
+
+@dataclass
+class Source:
+    path: Path
+    text: str
+    code: str
+    newlines: list[int]
+
+    def position(self, offset: int) -> tuple[int, int]:
+        i = bisect.bisect_right(self.newlines, offset - 1)
+        return i + 1, offset - (self.newlines[i - 1] + 1 if i else 0) + 1
+
+    def line_text(self, line: int) -> str:
+        start = self.newlines[line - 2] + 1 if line > 1 else 0
+        end = self.newlines[line - 1] if line - 1 < len(self.newlines) else len(self.text)
+        return self.text[start:end]
+
+def load_source(path: Path) -> Source:
+    text = path.read_text(errors="replace")
+    return Source(path, text, blank_js(text), [m.start() for m in re.finditer("\n", text)])
+
+def find_functions(source: Source) -> list[Function]:
+    code = source.code
+    pairs = matching_braces(code)
+    functions = []
+    for m in FUNCTION_RE.finditer(code):
+        name = m.group("decl") or m.group("assigned") or m.group("method")
+        if name in KEYWORDS:
+            continue
+        brace = m.end() - 1
+        if brace not in pairs:
+            continue
+        callee = enclosing_callee(code, m.start())
+        functions.append(Function(source.path, name, source.position(m.start())[0], m.start(), brace,
+                                   pairs[brace] + 1, deferred=callee in DEFERRED_CALLEES))
+    for fn in functions:
+        # Nested functions run when called (named) or later (deferred), not as part of fn itself
+        fn.excluded = [(other.head, other.end) for other in functions
+                       if other is not fn and fn.start < other.head < fn.end and (other.name or other.deferred)]
+    return functions
+
+def find_roots(source: Source, functions: list[Function]) -> list[tuple[str | Function, int]]:
+    """(callback, offset of the requestAnimationFrame call) for every rAF in the source."""
+    roots = []
+    for m in RAF_RE.finditer(source.code):
+        target = RAF_TARGET_RE.match(source.code, m.end())
+        if target:
+            roots.append((target.group(1), m.start()))
+            continue
+        # An inline callback: the first function literal inside the call
+        inline = [fn for fn in functions if fn.start > m.end() and enclosing_callee(source.code, fn.start) ==
+                  "requestAnimationFrame" and source.code.rfind("requestAnimationFrame", 0, fn.start) == m.start()]
+        if inline:
+            roots.append((inline[0], m.start()))
+        else:
+            # An expression-bodied arrow such as (t) => this._tick(t): follow the calls it makes
+            close = source.code.find(";", m.end())
+            for call in CALL_RE.finditer(source.code, m.end(), close if close != -1 else len(source.code)):
+                name = call.group(1) or call.group(2)
+                if name not in KEYWORDS and name != "requestAnimationFrame":
+                    roots.append((name, m.start()))
+    return roots
+
+@dataclass
+class Finding:
+    path: Path
+    line: int
+    col: int
+    rule: str
+    snippet: str
+    chain: list[str]
+
+    def format(self) -> str:
+        return (f"{self.path}:{self.line}:{self.col}: {self.rule}: {self.snippet} "
+                f"(per frame via {' -> '.join(self.chain)})")
+
+def lint(paths: list[Path], rules: list[str]) -> tuple[list[Finding], int, int]:
+    """Findings, number of rAF roots and number of per-frame functions."""
+    sources = {path: load_source(path) for path in paths}
+    functions = {path: find_functions(source) for path, source in sources.items()}
+    by_name = {}
+    for fns in functions.values():
+        for fn in fns:
+            if fn.name:
+                by_name.setdefault(fn.name, []).append(fn)
+
+    # Multi-source BFS so every function is reported with its shortest chain from a root
+    chains = {}
+    queue = deque()
+    for path, source in sources.items():
+        for target, offset in find_roots(source, functions[path]):
+            site = f"requestAnimationFrame@{path}:{source.position(offset)[0]}"
+            for fn in ([target] if isinstance(target, Function) else by_name.get(target, [])):
+                if id(fn) not in chains:
+                    chains[id(fn)] = [site, fn.label]
+                    queue.append(fn)
+    roots = len(chains)
+
+    findings = []
+    while queue:
+        fn = queue.popleft()
+        source = sources[fn.path]
+        chain = chains[id(fn)]
+        for rule in rules:
+            for m in fn.own_matches(RULES[rule], source.code):
+                line, col = source.position(m.start())
+                if SUPPRESS in source.line_text(line):
+                    continue
+                findings.append(Finding(fn.path, line, col, rule, " ".join(source.text[m.start():m.end()].split()), chain))
+        for m in fn.own_matches(CALL_RE, source.code):
+            name = m.group(1) or m.group(2)
+            # Lookups are reported at the call site; don't also charge the wrapper's internals
+            if name in KEYWORDS or name in DOM_QUERY_CALLS:
+                continue
+            for callee in by_name.get(name, []):
+                if id(callee) not in chains:
+                    chains[id(callee)] = chain + [callee.label]
+                    queue.append(callee)
+
+    # A site reached through several functions (nested literals) is reported once
+    unique = {}
+    for finding in findings:
+        unique.setdefault((str(finding.path), finding.line, finding.col, finding.rule), finding)
+    return sorted(unique.values(), key=lambda f: (str(f.path), f.line, f.col)), roots, len(chains)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Flag per-frame DOM, layout, allocation and O(n) work "
+                                                 "reachable from requestAnimationFrame callbacks.")
+    parser.add_argument("sources", nargs="*", type=Path, default=[Path("game.js")],
+                        help="JavaScript files to analyze together (default: game.js)")
+    parser.add_argument("--rules", type=lambda v: v.split(","), default=list(RULES),
+                        help=f"comma-separated rules to check (default: all of {','.join(RULES)})")
+    parser.add_argument("--exit-zero", action="store_true", help="report findings but exit 0")
+    args = parser.parse_args(argv)
+
+    unknown = [rule for rule in args.rules if rule not in RULES]
+    if unknown:
+        parser.error(f"unknown rule(s): {', '.join(unknown)}")
+    missing = [str(p) for p in args.sources if not p.is_file()]
+    if missing:
+        print(f"No such source file: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    findings, roots, reachable = lint(args.sources, args.rules)
+    for finding in findings:
+        print(finding.format())
+    counts = Counter(f.rule for f in findings)
+    breakdown = ", ".join(f"{rule} {counts[rule]}" for rule in args.rules if counts[rule])
+    print(f"{len(findings)} per-frame findings ({breakdown or 'none'}) in {reachable} functions "
+          f"reachable from {roots} requestAnimationFrame callbacks", file=sys.stderr)
+    return 1 if findings and not args.exit_zero else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
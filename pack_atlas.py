@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+# ]
+# ///
+"""
+Pack processed character strips into a few texture atlases.
+- Input: horizontal strips named <char>-<view>-<anim>.png (e.g. player4-back-swing.png)
+- Shelf-pack them into atlases of at most --max-size pixels per side
+- Output: atlas-0.png, atlas-1.png, ... plus atlas.json with the rect of
+  every frame, keyed by character / view / animation
+- --scale N packs the name@Nx.png DPR variants into atlas@Nx-*.png / atlas@Nx.json
+- update_atlas() repaints edited strips in place when their size is unchanged
+
+Usage:
+    pack_atlas.py <strip-dir> <out-dir> [--max-size 2048] [--padding 2] [--scale 2]
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from PIL import Image
+
+def parse_sprite_name(path: Path) -> tuple[str, str, str, int] | None:
+    """Split 'player4-back-swing@2x.png' into (character, view, animation, scale)."""
+    stem, scale = path.stem, 1
+    match = re.fullmatch(r"(.+)@(\d+)x", stem)
+    if match:
+        stem, scale = match.group(1), int(match.group(2))
+    parts = stem.split("-")
+    if len(parts) < 3:
+        return None
+    char, view, anim = parts[0], parts[1], "-".join(parts[2:])
+    if anim.endswith("-sheet"):
+        anim = anim[:-len("-sheet")]
+    return char, view, anim, scale
+
+def shelf_pack(sizes: list[tuple[int, int]], max_size: int, padding: int) -> list[tuple[int, int, int]]:
+    """Place rects on horizontal shelves, opening a new atlas when one fills up.
+
+    Returns (atlas_index, x, y) for each size, in input order.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements = [None] * len(sizes)
+    atlas, x, y, shelf_height = 0, 0, 0, 0
+
+    for i in order:
+        w, h = sizes[i]
+        if w > max_size or h > max_size:
+            raise ValueError(f"Sprite {w}x{h} does not fit in a {max_size}px atlas")
+        if x + w > max_size:
+            # Start a new shelf
+            x, y = 0, y + shelf_height + padding
+            shelf_height = 0
+        if y + h > max_size:
+            # Start a new atlas
+            atlas, x, y, shelf_height = atlas + 1, 0, 0, 0
+        placements[i] = (atlas, x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+
+    return placements
+
+def pack_atlas(sprite_paths: list[Path], out_dir: Path, max_size: int = 2048,
+               padding: int = 2, frame_width: int = 80, prefix: str = "atlas") -> dict:
+    """Pack strips into atlas images and return the frame manifest."""
+    images = [Image.open(p) for p in sprite_paths]
+    placements = shelf_pack([img.size for img in images], max_size, padding)
+    atlas_count = max((a for a, _, _ in placements), default=-1) + 1
+
+    # Trim each atlas to the area actually used
+    extents = [[0, 0] for _ in range(atlas_count)]
+    for img, (a, x, y) in zip(images, placements):
+        extents[a][0] = max(extents[a][0], x + img.width)
+        extents[a][1] = max(extents[a][1], y + img.height)
+    atlases = [Image.new('RGBA', tuple(size), (0, 0, 0, 0)) for size in extents]
+
+    scale = parse_sprite_name(sprite_paths[0])[3] if sprite_paths else 1
+    manifest = {"frameWidth": frame_width, "scale": scale, "atlases": [], "sprites": {}}
+    for path, img, (a, x, y) in zip(sprite_paths, images, placements):
+        atlases[a].paste(img.convert('RGBA'), (x, y))
+        char, view, anim, _ = parse_sprite_name(path)
+        frames = max(1, img.width // frame_width)
+        frame_w = img.width // frames
+        manifest["sprites"].setdefault(char, {}).setdefault(view, {})[anim] = {
+            "atlas": a,
+            "source": path.name,
+            "frames": [[x + i * frame_w, y, frame_w, img.height] for i in range(frames)],
+        }
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for a, atlas in enumerate(atlases):
+        name = f"{prefix}-{a}.png"
+        atlas.save(out_dir / name, 'PNG')
+        manifest["atlases"].append({"file": name, "width": atlas.width, "height": atlas.height})
+        print(f"Saved: {out_dir / name} ({atlas.width}x{atlas.height})")
+
+    manifest_path = out_dir / f"{prefix}.json"
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    print(f"Saved: {manifest_path} ({len(sprite_paths)} sprites in {atlas_count} atlases)")
+    return manifest
+
+def update_atlas(sprite_paths: list[Path], out_dir: Path, prefix: str = "atlas") -> bool:
+    """Repaint changed strips in place, leaving the layout and atlas.json untouched.
+
+    Returns False (without writing anything) when a strip is new or changed
+    size, in which case the atlas has to be repacked.
+    """
+    manifest_path = out_dir / f"{prefix}.json"
+    if not manifest_path.exists():
+        return False
+    manifest = json.loads(manifest_path.read_text())
+
+    patches = []
+    for path in sprite_paths:
+        parsed = parse_sprite_name(path)
+        if parsed is None:
+            return False
+        char, view, anim, _ = parsed
+        entry = manifest["sprites"].get(char, {}).get(view, {}).get(anim)
+        if entry is None or entry["source"] != path.name:
+            return False
+        img = Image.open(path).convert('RGBA')
+        frames = entry["frames"]
+        x, y = frames[0][0], frames[0][1]
+        width = frames[-1][0] + frames[-1][2] - x
+        if (img.width, img.height) != (width, frames[0][3]) or max(1, img.width // manifest["frameWidth"]) != len(frames):
+            return False
+        patches.append((entry["atlas"], (x, y, x + img.width, y + img.height), img))
+
+    atlases = {}
+    for a, box, img in patches:
+        if a not in atlases:
+            atlases[a] = Image.open(out_dir / manifest["atlases"][a]["file"]).convert('RGBA')
+        atlases[a].paste((0, 0, 0, 0), box)
+        atlases[a].paste(img, box[:2])
+    for a, atlas in atlases.items():
+        atlas.save(out_dir / manifest["atlases"][a]["file"], 'PNG')
+        print(f"Updated: {out_dir / manifest['atlases'][a]['file']} ({len(patches)} strips repainted)")
+    return True
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Pack character sprite strips into texture atlases.")
+    parser.add_argument("strip_dir", type=Path, help="directory of processed <char>-<view>-<anim>.png strips")
+    parser.add_argument("out_dir", type=Path, help="where to write atlas PNGs and the JSON manifest")
+    parser.add_argument("--max-size", type=int, default=2048, help="max atlas width/height (default: 2048)")
+    parser.add_argument("--padding", type=int, default=2, help="gap between strips to avoid bleed (default: 2)")
+    parser.add_argument("--frame-width", type=int, default=80, help="width of one frame (default: 80)")
+    parser.add_argument("--prefix", default="atlas", help="output file prefix (default: atlas)")
+    parser.add_argument("--scale", type=int, default=1, help="device pixel ratio of the strips to pack (default: 1)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in sorted(args.strip_dir.glob("*.png")):
+        parsed = parse_sprite_name(path)
+        if parsed is None:
+            print(f"  Skipping {path.name}: not <char>-<view>-<anim>.png")
+            continue
+        if parsed[3] == args.scale:
+            paths.append(path)
+    if not paths:
+        print(f"No sprite strips found in {args.strip_dir}", file=sys.stderr)
+        return 1
+
+    prefix = args.prefix if args.scale == 1 else f"{args.prefix}@{args.scale}x"
+    pack_atlas(paths, args.out_dir, args.max_size, args.padding, args.frame_width * args.scale, prefix)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
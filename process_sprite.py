@@ -12,14 +12,91 @@ Process a 4x2 grid sprite sheet into a horizontal 8-frame sprite sheet.
 - Remove charcoal background (#2d2d2d, RGB < 80 and gray)
 - Scale each frame to 80×96 
 - Output: 640×96 horizontal sheet with transparency
+
+Usage:
+    process_sprite.py <input.png> <output.png>
+    process_sprite.py --batch <dir-or-glob> --out-dir <dir> [--jobs N] [--cache manifest.json]
+    process_sprite.py <input.png> <output.png> --resample reduce
+    process_sprite.py --resample-report --batch <dir-or-glob>
+    process_sprite.py <input.png> <output.png> --profile
+    process_sprite.py --validate --batch <dir-or-glob>
 """
 
+import argparse
+import glob
+import json
+import os
+import resource
 import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 import numpy as np
 
-def remove_charcoal_background(img: Image.Image, threshold: int = 80) -> Image.Image:
+from sprite_cache import ProcessCache, file_digest
+
+class StageProfiler:
+    """Records wall time and peak memory for each pipeline stage.
+    
+    Peak memory is reported two ways: bytes traced by tracemalloc during the
+    stage (NumPy buffers; Pillow's C allocations are not traced) and how far
+    the stage pushed the process's peak RSS. ru_maxrss only ever grows over a
+    process's lifetime, so a stage that stays under an earlier peak (common on
+    reused batch workers) records 0 growth.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.records = []
+    
+    @contextmanager
+    def stage(self, name: str, frame: int | None = None):
+        if not self.enabled:
+            yield
+            return
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        rss_before = max_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            self.records.append({
+                "stage": name,
+                "frame": frame,
+                "wall_s": elapsed,
+                "peak_traced_bytes": max(peak, 0),
+                "rss_peak_growth_bytes": max_rss_bytes() - rss_before,
+            })
+    
+    def summary(self) -> dict:
+        """Totals per stage, in pipeline order."""
+        stages = {}
+        for record in self.records:
+            totals = stages.setdefault(record["stage"], {"wall_s": 0.0, "calls": 0, "peak_traced_bytes": 0,
+                                                         "rss_peak_growth_bytes": 0})
+            totals["wall_s"] += record["wall_s"]
+            totals["calls"] += 1
+            totals["peak_traced_bytes"] = max(totals["peak_traced_bytes"], record["peak_traced_bytes"])
+            totals["rss_peak_growth_bytes"] += record["rss_peak_growth_bytes"]
+        return stages
+
+NULL_PROFILER = StageProfiler(enabled=False)
+
+def max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def profile_output_path(output_path: str | Path) -> Path:
+    return Path(output_path).with_suffix(".profile.json")
+
+def remove_charcoal_background(img: Image.Image, threshold: int = 80, tolerance: int = 30) -> Image.Image:
     """Remove dark charcoal background, making it transparent."""
     # Convert to RGBA if needed
     if img.mode != 'RGBA':
@@ -30,10 +107,10 @@ def remove_charcoal_background(img: Image.Image, threshold: int = 80) -> Image.I
     
     # Detect charcoal/dark pixels: all RGB channels < threshold and roughly equal (gray)
     is_dark = (r < threshold) & (g < threshold) & (b < threshold)
-    # Check if it's grayish (channels within 30 of each other)
+    # Check if it's grayish (channels within tolerance of each other)
     max_rgb = np.maximum(np.maximum(r, g), b)
     min_rgb = np.minimum(np.minimum(r, g), b)
-    is_gray = (max_rgb - min_rgb) < 30
+    is_gray = (max_rgb - min_rgb) < tolerance
     
     # Make matching pixels transparent
     mask = is_dark & is_gray
@@ -41,61 +118,656 @@ def remove_charcoal_background(img: Image.Image, threshold: int = 80) -> Image.I
     
     return Image.fromarray(data)
 
-def process_sprite_sheet(input_path: str, output_path: str, 
-                         grid_cols: int = 4, grid_rows: int = 2,
-                         target_frame_width: int = 80, target_frame_height: int = 96) -> bool:
-    """Process a grid sprite sheet into a horizontal strip."""
-    try:
-        img = Image.open(input_path)
-        width, height = img.size
-        
-        # Calculate frame dimensions
-        frame_width = width // grid_cols
-        frame_height = height // grid_rows
-        
-        print(f"Input: {width}x{height}, Frame: {frame_width}x{frame_height}")
+def key_charcoal_background(data: np.ndarray, threshold: int = 80, tolerance: int = 30,
+                            band_rows: int = 256) -> np.ndarray:
+    """Zero the alpha of charcoal background pixels in an RGBA array, in place.
+    
+    Same rule as remove_charcoal_background, but run once over the whole sheet
+    in horizontal bands that share two preallocated scratch buffers instead of
+    building fresh per-frame temporaries.
+    """
+    height, width = data.shape[:2]
+    max_buf = np.empty((min(band_rows, height), width), dtype=np.uint8)
+    min_buf = np.empty_like(max_buf)
+    
+    for top in range(0, height, band_rows):
+        band = data[top:top + band_rows]
+        rows = band.shape[0]
+        max_rgb, min_rgb = max_buf[:rows], min_buf[:rows]
+        r, g, b = band[:, :, 0], band[:, :, 1], band[:, :, 2]
+        np.maximum(r, g, out=max_rgb)
+        np.maximum(max_rgb, b, out=max_rgb)
+        np.minimum(r, g, out=min_rgb)
+        np.minimum(min_rgb, b, out=min_rgb)
         
-        # Extract frames in order (left-to-right, top-to-bottom)
+        # All channels < threshold is the same as the brightest channel < threshold
+        np.subtract(max_rgb, min_rgb, out=min_rgb)
+        mask = np.less(max_rgb, threshold, out=max_rgb.view(np.bool_))
+        mask &= np.less(min_rgb, tolerance, out=min_rgb.view(np.bool_))
+        np.putmask(band[:, :, 3], mask, 0)
+    
+    return data
+
+def load_rgba_array(img: Image.Image, band_rows: int = 256) -> np.ndarray:
+    """Decode an image into a writable HxWx4 uint8 array.
+    
+    The array is allocated once and filled band by band, so no second
+    full-size RGBA copy is held while converting.
+    """
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    data = np.empty((img.height, img.width, 4), dtype=np.uint8)
+    for top in range(0, img.height, band_rows):
+        band = np.asarray(img.crop((0, top, img.width, min(top + band_rows, img.height))))
+        data[top:top + band.shape[0], :, :band.shape[2]] = band
+    if img.mode == 'RGB':
+        data[:, :, 3] = 255
+    return data
+
+def extract_frames(img: Image.Image | np.ndarray, grid_cols: int, grid_rows: int,
+                   keying: str = "sheet", threshold: int = 80, tolerance: int = 30,
+                   profiler: StageProfiler = NULL_PROFILER) -> list[Image.Image]:
+    """Split a grid sheet into background-keyed frames (left-to-right, top-to-bottom).
+    
+    keying="sheet" keys the whole sheet once and slices frames as views of the
+    keyed array; keying="frame" is the original crop-then-key path. img may
+    also be an already-decoded writable RGBA array (see DecodedRawStore),
+    which is keyed in place.
+    """
+    if isinstance(img, np.ndarray) and keying == "frame":
+        img = Image.fromarray(img)
+    if isinstance(img, np.ndarray):
+        height, width = img.shape[:2]
+    else:
+        width, height = img.size
+    frame_width = width // grid_cols
+    frame_height = height // grid_rows
+    cells = [(col * frame_width, row * frame_height)
+             for row in range(grid_rows) for col in range(grid_cols)]
+    
+    if keying == "frame":
         frames = []
-        for row in range(grid_rows):
-            for col in range(grid_cols):
-                x = col * frame_width
-                y = row * frame_height
+        for i, (x, y) in enumerate(cells):
+            with profiler.stage("crop", i):
                 frame = img.crop((x, y, x + frame_width, y + frame_height))
-                frames.append(frame)
-        
-        # Process each frame
-        processed_frames = []
-        for i, frame in enumerate(frames):
-            # Remove background
-            frame = remove_charcoal_background(frame)
-            # Scale to target size
-            frame = frame.resize((target_frame_width, target_frame_height), Image.Resampling.LANCZOS)
-            processed_frames.append(frame)
+            with profiler.stage("key", i):
+                frames.append(remove_charcoal_background(frame, threshold, tolerance))
+        return frames
+    if keying != "sheet":
+        raise ValueError(f"Unknown keying mode: {keying}")
+    
+    with profiler.stage("convert"):
+        data = img if isinstance(img, np.ndarray) else load_rgba_array(img)
+    with profiler.stage("key"):
+        key_charcoal_background(data, threshold, tolerance)
+    frames = []
+    for i, (x, y) in enumerate(cells):
+        with profiler.stage("crop", i):
+            frames.append(Image.fromarray(data[y:y + frame_height, x:x + frame_width]))
+    return frames
+
+def resize_frame(frame: Image.Image, size: tuple[int, int], resample: str = "lanczos") -> Image.Image:
+    """Scale a keyed RGBA frame to the target size.
+    
+    resample="lanczos" is a single LANCZOS pass. resample="reduce" first does
+    an integer box reduction to just above the target size, then a short
+    LANCZOS step; both stages run on premultiplied alpha like resize() does.
+    """
+    if resample == "lanczos":
+        return frame.resize(size, Image.Resampling.LANCZOS)
+    if resample != "reduce":
+        raise ValueError(f"Unknown resample mode: {resample}")
+    
+    factor = max(1, min(frame.width // size[0], frame.height // size[1]))
+    premultiplied = frame.convert('RGBa')
+    if factor > 1:
+        premultiplied = premultiplied.reduce(factor)
+    return premultiplied.resize(size, Image.Resampling.LANCZOS).convert('RGBA')
+
+class DecodedRawStore:
+    """On-disk cache of decoded raw sheets as .npy arrays, keyed by file hash.
+    
+    Arrays are opened memory-mapped copy-on-write: frames slice straight out
+    of the page cache, and in-place keying touches private pages only, so the
+    stored pixels stay pristine for the next experiment.
+    """
+    
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+    
+    def path_for(self, raw_path: str | Path) -> Path:
+        return self.root / f"{file_digest(Path(raw_path))}.npy"
+    
+    def load(self, raw_path: str | Path, writable: bool = True) -> np.ndarray:
+        """Return the decoded HxWx4 RGBA array, decoding the PNG only on a miss."""
+        npy_path = self.path_for(raw_path)
+        if not npy_path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            data = load_rgba_array(Image.open(raw_path))
+            # Write under a unique temp name so concurrent workers can't collide
+            tmp_path = npy_path.with_name(f"{npy_path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, data)
+            os.replace(tmp_path, npy_path)
+        return np.load(npy_path, mmap_mode='c' if writable else 'r')
+
+def render_sprite_sheet(img: Image.Image | np.ndarray, grid_cols: int = 4, grid_rows: int = 2,
+                        target_frame_width: int = 80, target_frame_height: int = 96,
+                        keying: str = "sheet", resample: str = "lanczos",
+                        threshold: int = 80, tolerance: int = 30) -> Image.Image:
+    """Build the horizontal strip for a grid sheet without touching disk."""
+    return render_sprite_sheets(img, grid_cols, grid_rows, target_frame_width, target_frame_height,
+                                keying, resample, threshold, tolerance)[1]
+
+def render_sprite_sheets(img: Image.Image | np.ndarray, grid_cols: int = 4, grid_rows: int = 2,
+                         target_frame_width: int = 80, target_frame_height: int = 96,
+                         keying: str = "sheet", resample: str = "lanczos",
+                         threshold: int = 80, tolerance: int = 30,
+                         scales: tuple[int, ...] = (1,),
+                         profiler: StageProfiler = NULL_PROFILER) -> dict[int, Image.Image]:
+    """Build one strip per device pixel ratio from a single decode and key.
+    
+    Each scale resamples the same keyed frames to scale × the target frame size.
+    """
+    frames = extract_frames(img, grid_cols, grid_rows, keying, threshold, tolerance, profiler)
+    
+    sheets = {}
+    for scale in scales:
+        frame_width, frame_height = target_frame_width * scale, target_frame_height * scale
         
         # Create output sprite sheet
-        output_width = target_frame_width * len(processed_frames)
-        output_height = target_frame_height
-        output_img = Image.new('RGBA', (output_width, output_height), (0, 0, 0, 0))
+        output_img = Image.new('RGBA', (frame_width * len(frames), frame_height), (0, 0, 0, 0))
         
-        # Paste frames
-        for i, frame in enumerate(processed_frames):
-            output_img.paste(frame, (i * target_frame_width, 0))
+        for i, frame in enumerate(frames):
+            with profiler.stage(f"resize@{scale}x", i):
+                frame = resize_frame(frame, (frame_width, frame_height), resample)
+            with profiler.stage(f"paste@{scale}x", i):
+                output_img.paste(frame, (i * frame_width, 0))
+        sheets[scale] = output_img
+    
+    return sheets
+
+def scaled_output_path(output_path: str | Path, scale: int) -> Path:
+    """player4-back-swing.png → player4-back-swing@2x.png; 1x keeps the plain name."""
+    path = Path(output_path)
+    if scale == 1:
+        return path
+    return path.with_name(f"{path.stem}@{scale}x{path.suffix}")
+
+OUTPUT_SUFFIXES = {"png": ".png", "indexed": ".png", "webp": ".webp"}
+
+def check_output_suffix(output_path: str | Path, output_format: str):
+    """Raise ValueError when output_path's extension doesn't match the bytes output_format writes."""
+    expected = OUTPUT_SUFFIXES.get(output_format)
+    if expected is not None and Path(output_path).suffix.lower() != expected:
+        raise ValueError(f"{output_format} output needs a {expected} path, got {Path(output_path).name}")
+
+def save_sprite_sheet(img: Image.Image, output_path: str, output_format: str = "png") -> int:
+    """Encode a processed sheet and return its size in bytes.
+    
+    "png" is plain RGBA PNG, "indexed" a palette-quantized PNG (alpha kept in
+    the palette), "webp" lossless WebP.
+    """
+    if output_format == "png":
+        img.save(output_path, 'PNG')
+    elif output_format == "indexed":
+        img.quantize(colors=256, method=Image.Quantize.FASTOCTREE).save(output_path, 'PNG', optimize=True)
+    elif output_format == "webp":
+        img.save(output_path, 'WEBP', lossless=True, quality=100, method=6)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return os.path.getsize(output_path)
+
+def process_sprite_sheet(input_path: str, output_path: str, 
+                         grid_cols: int = 4, grid_rows: int = 2,
+                         target_frame_width: int = 80, target_frame_height: int = 96,
+                         keying: str = "sheet", resample: str = "lanczos",
+                         threshold: int = 80, tolerance: int = 30,
+                         output_format: str = "png", max_bytes: int | None = None,
+                         scales: tuple[int, ...] = (1,), profile: bool = False,
+                         raw_store: str | None = None) -> bool:
+    """Process a grid sprite sheet into a horizontal strip.
+    
+    With several scales, every DPR variant is written next to output_path
+    (name@2x.png, ...) from one decode. Fails when an encoded sheet is larger
+    than max_bytes (scaled by scale² for the larger variants). With profile,
+    per-stage timings are written to name.profile.json. With raw_store, the
+    decoded sheet comes from (or is added to) that DecodedRawStore directory.
+    """
+    profiler = StageProfiler(enabled=profile)
+    # A caller that is already tracing keeps its session
+    started_tracing = profile and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        check_output_suffix(output_path, output_format)
+        with profiler.stage("decode"):
+            if raw_store:
+                img = DecodedRawStore(raw_store).load(input_path)
+                height, width = img.shape[:2]
+            else:
+                img = Image.open(input_path)
+                img.load()
+                width, height = img.size
+        print(f"Input: {width}x{height}, Frame: {width // grid_cols}x{height // grid_rows}")
+        
+        sheets = render_sprite_sheets(img, grid_cols, grid_rows,
+                                      target_frame_width, target_frame_height, keying, resample,
+                                      threshold, tolerance, scales, profiler)
         
         # Save
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        output_img.save(output_path, 'PNG')
-        print(f"Saved: {output_path} ({output_width}x{output_height})")
-        return True
+        within_budget = True
+        for scale, output_img in sheets.items():
+            path = scaled_output_path(output_path, scale)
+            with profiler.stage(f"encode@{scale}x"):
+                size = save_sprite_sheet(output_img, str(path), output_format)
+            print(f"Saved: {path} ({output_img.width}x{output_img.height}, {size} bytes)")
+            if max_bytes is not None and size > max_bytes * scale * scale:
+                print(f"Error processing {input_path}: {path} is {size} bytes, "
+                      f"over the {max_bytes * scale * scale} byte budget", file=sys.stderr)
+                within_budget = False
+        
+        if profile:
+            write_profile(profiler, input_path, output_path)
+        return within_budget
         
     except Exception as e:
         print(f"Error processing {input_path}: {e}", file=sys.stderr)
         return False
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
+def write_profile(profiler: StageProfiler, input_path: str, output_path: str) -> Path:
+    path = profile_output_path(output_path)
+    path.write_text(json.dumps({
+        "input": str(input_path),
+        "output": str(output_path),
+        "wall_s": sum(r["wall_s"] for r in profiler.records),
+        "process_peak_rss_bytes": max_rss_bytes(),
+        "stages": profiler.summary(),
+        "records": profiler.records,
+    }, indent=2))
+    print(f"Profile: {path}")
+    return path
+
+def summarize_profiles(paths: list[Path]) -> dict:
+    """Aggregate per-sheet profiles into roster-wide stage totals."""
+    stages = {}
+    total = 0.0
+    max_rss = 0
+    for path in paths:
+        profile = json.loads(path.read_text())
+        total += profile["wall_s"]
+        max_rss = max(max_rss, profile["process_peak_rss_bytes"])
+        for name, stats in profile["stages"].items():
+            agg = stages.setdefault(name, {"wall_s": 0.0, "calls": 0, "peak_traced_bytes": 0,
+                                           "rss_peak_growth_bytes": 0})
+            agg["wall_s"] += stats["wall_s"]
+            agg["calls"] += stats["calls"]
+            agg["peak_traced_bytes"] = max(agg["peak_traced_bytes"], stats["peak_traced_bytes"])
+            agg["rss_peak_growth_bytes"] += stats["rss_peak_growth_bytes"]
+    for agg in stages.values():
+        agg["share"] = agg["wall_s"] / total if total else 0.0
+    dominant = max(stages, key=lambda name: stages[name]["wall_s"]) if stages else None
+    return {"sheets": len(paths), "wall_s": total, "process_peak_rss_bytes": max_rss,
+            "dominant_stage": dominant, "stages": stages}
+
+def verify_keying(input_path: str, grid_cols: int = 4, grid_rows: int = 2,
+                  target_frame_width: int = 80, target_frame_height: int = 96,
+                  resample: str = "lanczos", threshold: int = 80, tolerance: int = 30) -> bool:
+    """Check that whole-sheet keying renders bit-identically to per-frame keying.
+    
+    Takes the same settings as the real run, so the keying verified is the one applied.
+    """
+    img = Image.open(input_path)
+    img.load()
+    settings = dict(grid_cols=grid_cols, grid_rows=grid_rows, target_frame_width=target_frame_width,
+                    target_frame_height=target_frame_height, resample=resample,
+                    threshold=threshold, tolerance=tolerance)
+    sheet = np.asarray(render_sprite_sheet(img, keying="sheet", **settings))
+    frame = np.asarray(render_sprite_sheet(img, keying="frame", **settings))
+    identical = sheet.shape == frame.shape and np.array_equal(sheet, frame)
+    if identical:
+        print(f"  ✓ {input_path}: sheet and frame keying are bit-identical")
+    else:
+        differing = int(np.count_nonzero(sheet != frame)) if sheet.shape == frame.shape else -1
+        print(f"  ✗ {input_path}: keying outputs differ ({differing} bytes)")
+    return identical
+
+def resample_report(input_path: str, grid_cols: int = 4, grid_rows: int = 2,
+                    target_frame_width: int = 80, target_frame_height: int = 96,
+                    threshold: int = 80, tolerance: int = 30) -> dict:
+    """Compare the two-stage reduce path against plain LANCZOS for one sheet."""
+    img = Image.open(input_path)
+    img.load()
+    frames = extract_frames(img, grid_cols, grid_rows, threshold=threshold, tolerance=tolerance)
+    
+    timings = {}
+    outputs = {}
+    for mode in ("lanczos", "reduce"):
+        start = time.perf_counter()
+        outputs[mode] = np.stack([np.asarray(resize_frame(f, (target_frame_width, target_frame_height), mode))
+                                  for f in frames])
+        timings[mode] = time.perf_counter() - start
+    
+    # Compare premultiplied values so colour under fully transparent pixels doesn't count
+    premultiplied = {}
+    for mode, out in outputs.items():
+        out = out.astype(np.int32)
+        out[..., :3] = out[..., :3] * out[..., 3:] // 255
+        premultiplied[mode] = out
+    diff = np.abs(premultiplied["lanczos"] - premultiplied["reduce"])
+    report = {
+        "sheet": Path(input_path).name,
+        "lanczos_s": timings["lanczos"],
+        "reduce_s": timings["reduce"],
+        "max_abs_diff": int(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "pixels_over_2": float((diff.max(axis=-1) > 2).mean()),
+    }
+    print(f"  {report['sheet']}: resize {timings['lanczos'] * 1000:.0f}ms → {timings['reduce'] * 1000:.0f}ms, "
+          f"max diff {report['max_abs_diff']}, mean diff {report['mean_abs_diff']:.3f}, "
+          f"{report['pixels_over_2'] * 100:.2f}% of pixels off by >2")
+    return report
+
+def validate_raw_sheet(input_path: str, expected_size: tuple[int, int] | None = (2816, 1536),
+                       grid_cols: int = 4, grid_rows: int = 2, threshold: int = 80, tolerance: int = 30,
+                       stride: int = 8, min_background: float = 0.5, max_background: float = 0.995,
+                       max_area_ratio: float = 3.0, max_color_distance: float = 80) -> list[str]:
+    """Cheap sanity check of a generated raw sheet; returns a list of problems (empty if OK).
+    
+    Geometry comes from the PNG header alone. The pixel checks look at one
+    pixel per `stride`x`stride` block: each grid cell must be mostly charcoal
+    background but not entirely (empty frame), and the character's area and
+    average colour must not vary wildly between frames.
+    """
+    try:
+        img = Image.open(input_path)
+    except (UnidentifiedImageError, OSError) as e:
+        return [f"unreadable: {e}"]
+    if expected_size and img.size != tuple(expected_size):
+        return [f"size {img.width}x{img.height}, expected {expected_size[0]}x{expected_size[1]}"]
+    if img.width % grid_cols or img.height % grid_rows:
+        return [f"size {img.width}x{img.height} does not split into a {grid_cols}x{grid_rows} grid"]
+    
+    # PNG rows aren't randomly accessible, so this is one decode, but nearest-neighbour
+    # sampling never builds a full-resolution array or copy
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    try:
+        sample = np.asarray(img.resize((img.width // stride, img.height // stride), Image.Resampling.NEAREST))
+    except (UnidentifiedImageError, OSError) as e:
+        # A valid header over truncated or corrupt pixel data fails here, at decode
+        return [f"unreadable: {e}"]
+    sample = sample[..., :3].astype(np.int16)
+    background = (sample.max(axis=-1) < threshold) & (np.ptp(sample, axis=-1) < tolerance)
+    cell_h, cell_w = sample.shape[0] // grid_rows, sample.shape[1] // grid_cols
+    
+    problems = []
+    areas, colors = [], []
+    for row in range(grid_rows):
+        for col in range(grid_cols):
+            cell = (slice(row * cell_h, (row + 1) * cell_h), slice(col * cell_w, (col + 1) * cell_w))
+            coverage = background[cell].mean()
+            frame = row * grid_cols + col + 1
+            if coverage > max_background:
+                problems.append(f"frame {frame} is empty ({coverage:.1%} background)")
+            elif coverage < min_background:
+                problems.append(f"frame {frame} background is not charcoal ({coverage:.1%} background)")
+            foreground = ~background[cell]
+            areas.append(foreground.sum())
+            colors.append(sample[cell][foreground].mean(axis=0) if foreground.any() else None)
+    if problems:
+        return problems
+    
+    median_area = float(np.median(areas))
+    median_color = np.median([c for c in colors if c is not None], axis=0)
+    for frame, (area, color) in enumerate(zip(areas, colors), start=1):
+        ratio = area / median_area if median_area else 0.0
+        if not 1 / max_area_ratio <= ratio <= max_area_ratio:
+            problems.append(f"frame {frame} character area is {ratio:.2f}x the median")
+        distance = float(np.linalg.norm(color - median_color))
+        if distance > max_color_distance:
+            problems.append(f"frame {frame} colours differ from the other frames (distance {distance:.0f})")
+    return problems
+
+def find_raw_sheets(source: str) -> list[Path]:
+    """Resolve a directory or glob pattern to a sorted list of raw PNG sheets."""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob("*.png"))
+    return sorted(Path(p) for p in glob.glob(source) if p.lower().endswith(".png"))
+
+def batch_output_path(input_path: Path, out_dir: Path, output_format: str = "png") -> Path:
+    """Map a raw sheet to its output path, dropping the generator's -raw suffix."""
+    stem = input_path.stem
+    if stem.endswith("-raw"):
+        stem = stem[:-len("-raw")]
+    return out_dir / f"{stem}{OUTPUT_SUFFIXES[output_format]}"
+
+def process_batch(inputs: list[Path], out_dir: Path, jobs: int | None = None, **options) -> dict:
+    """Process many raw sheets in parallel, one sheet per worker process.
+    
+    Extra keyword options are passed through to process_sprite_sheet.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    results = {"success": [], "failed": []}
+    
+    with ProcessPoolExecutor(max_workers=min(jobs, len(inputs))) as pool:
+        futures = {
+            pool.submit(process_sprite_sheet, str(src),
+                        str(batch_output_path(src, out_dir, options.get("output_format", "png"))), **options): src
+            for src in inputs
+        }
+        for future in as_completed(futures):
+            src = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                # Worker died (e.g. OOM kill) rather than returning False
+                print(f"  ✗ {src.name}: worker failed: {e}", file=sys.stderr)
+                ok = False
+            if ok:
+                print(f"  ✓ {src.name}")
+                results["success"].append(src.name)
+            else:
+                print(f"  ✗ {src.name}")
+                results["failed"].append(src.name)
+    
+    return results
+
+def parse_dims(value: str) -> tuple[int, int]:
+    """Parse a WxH / COLSxROWS argument such as '80x96'."""
+    try:
+        a, b = value.lower().split("x")
+        return int(a), int(b)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NxM, got {value!r}")
+
+def processing_settings(args: argparse.Namespace) -> dict:
+    """Every option that affects output pixels, as process_sprite_sheet keywords.
+    
+    Keying mode is left out: both modes are bit-identical.
+    """
+    return {
+        "grid_cols": args.grid[0],
+        "grid_rows": args.grid[1],
+        "target_frame_width": args.frame_size[0],
+        "target_frame_height": args.frame_size[1],
+        "threshold": args.threshold,
+        "tolerance": args.tolerance,
+        "resample": args.resample,
+        "output_format": args.format,
+        "scales": tuple(args.scales),
+    }
+
+def settings_argv(settings: dict) -> list[str]:
+    """Command-line flags for process_sprite_sheet keywords, the inverse of processing_settings.
+
+    Raises ValueError for a keyword with no flag rather than dropping it.
+    """
+    settings = {k: v for k, v in settings.items() if v is not None}
+    argv = []
+    for flag, (first, second) in {"--grid": ("grid_cols", "grid_rows"),
+                                  "--frame-size": ("target_frame_width", "target_frame_height")}.items():
+        if first in settings or second in settings:
+            if first not in settings or second not in settings:
+                raise ValueError(f"{flag} needs both {first} and {second}")
+            argv += [flag, f"{settings.pop(first)}x{settings.pop(second)}"]
+    flags = {"threshold": "--threshold", "tolerance": "--tolerance", "resample": "--resample",
+             "output_format": "--format", "keying": "--keying", "max_bytes": "--max-bytes",
+             "raw_store": "--raw-store"}
+    for key, value in settings.items():
+        if key in flags:
+            argv += [flags[key], str(value)]
+        elif key == "scales":
+            argv += ["--scales", ",".join(str(scale) for scale in value)]
+        elif key == "profile":
+            argv += ["--profile"] if value else []
+        else:
+            raise ValueError(f"No command-line flag for processing setting {key!r}")
+    return argv
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert 4x2 grid sprite sheets into horizontal strips.")
+    parser.add_argument("input", nargs="?", help="raw 4x2 sprite sheet")
+    parser.add_argument("output", nargs="?", help="output horizontal strip")
+    parser.add_argument("--batch", metavar="SOURCE", help="directory or glob of raw sheets to process")
+    parser.add_argument("--out-dir", type=Path, help="output directory for --batch")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="worker processes for --batch (default: CPU count)")
+    parser.add_argument("--keying", choices=["sheet", "frame"], default="sheet",
+                        help="key the whole sheet once (default) or each cropped frame")
+    parser.add_argument("--resample", choices=["lanczos", "reduce"], default="lanczos",
+                        help="single LANCZOS pass (default) or box reduce then LANCZOS")
+    parser.add_argument("--threshold", type=int, default=80,
+                        help="background channels must all be below this (default: 80)")
+    parser.add_argument("--tolerance", type=int, default=30,
+                        help="max channel spread for a pixel to count as gray (default: 30)")
+    parser.add_argument("--grid", type=parse_dims, default=(4, 2), metavar="COLSxROWS",
+                        help="raw sheet grid layout (default: 4x2)")
+    parser.add_argument("--frame-size", type=parse_dims, default=(80, 96), metavar="WxH",
+                        help="output frame size (default: 80x96)")
+    parser.add_argument("--format", choices=list(OUTPUT_SUFFIXES), default="png",
+                        help="plain RGBA PNG (default), palette-quantized PNG, or lossless WebP")
+    parser.add_argument("--max-bytes", type=int, default=None,
+                        help="fail any sheet whose encoded size exceeds this budget")
+    parser.add_argument("--scales", type=lambda v: sorted({int(x) for x in v.split(",")}), default=[1],
+                        metavar="1,2,3", help="device pixel ratios to emit from one decode (default: 1)")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-stage wall time and peak memory to <output>.profile.json")
+    parser.add_argument("--raw-store", metavar="DIR",
+                        help="reuse decoded raws memory-mapped from DIR instead of re-decoding PNGs")
+    parser.add_argument("--cache", type=Path, metavar="MANIFEST",
+                        help="skip --batch sheets whose raw hash and settings match this manifest")
+    parser.add_argument("--resample-report", action="store_true",
+                        help="report per-pixel difference and resize time of reduce vs lanczos, then exit")
+    parser.add_argument("--verify-keying", action="store_true",
+                        help="check sheet and frame keying give identical output, then exit")
+    parser.add_argument("--validate", action="store_true",
+                        help="check raw sheet geometry, background and frame consistency, then exit")
+    args = parser.parse_args(argv)
+    
+    if args.validate:
+        inputs = find_raw_sheets(args.batch) if args.batch else [Path(args.input)] if args.input else []
+        if not inputs:
+            parser.error("--validate needs an input sheet or --batch")
+        invalid = 0
+        for src in inputs:
+            problems = validate_raw_sheet(str(src), grid_cols=args.grid[0], grid_rows=args.grid[1],
+                                          threshold=args.threshold, tolerance=args.tolerance)
+            if problems:
+                invalid += 1
+                print(f"  ✗ {src.name}: {'; '.join(problems)}")
+            else:
+                print(f"  ✓ {src.name}: valid")
+        return 1 if invalid else 0
+    
+    if args.verify_keying:
+        inputs = find_raw_sheets(args.batch) if args.batch else [Path(args.input)] if args.input else []
+        if not inputs:
+            parser.error("--verify-keying needs an input sheet or --batch")
+        results = [verify_keying(str(src), args.grid[0], args.grid[1], args.frame_size[0], args.frame_size[1],
+                                 args.resample, args.threshold, args.tolerance) for src in inputs]
+        return 0 if all(results) else 1
+    
+    if args.resample_report:
+        inputs = find_raw_sheets(args.batch) if args.batch else [Path(args.input)] if args.input else []
+        if not inputs:
+            parser.error("--resample-report needs an input sheet or --batch")
+        reports = [resample_report(str(src), args.grid[0], args.grid[1], args.frame_size[0], args.frame_size[1],
+                                   args.threshold, args.tolerance) for src in inputs]
+        worst = max(r["max_abs_diff"] for r in reports)
+        mean = sum(r["mean_abs_diff"] for r in reports) / len(reports)
+        print(f"Worst max diff {worst}, average mean diff {mean:.3f} across {len(reports)} sheets")
+        return 0
+    
+    if args.batch:
+        if args.out_dir is None:
+            parser.error("--batch requires --out-dir")
+        inputs = find_raw_sheets(args.batch)
+        if not inputs:
+            print(f"No raw sheets found for {args.batch}", file=sys.stderr)
+            return 1
+        
+        settings = processing_settings(args)
+        cache = ProcessCache(args.cache) if args.cache else None
+        keys = {}
+        if cache:
+            keys = {src.name: cache.key_for(src, settings) for src in inputs}
+            stale = [src for src in inputs
+                     if not all(cache.is_fresh(scaled_output_path(batch_output_path(src, args.out_dir, args.format), scale),
+                                               keys[src.name])
+                                for scale in args.scales)]
+            print(f"Cache: {len(inputs) - len(stale)} up to date, {len(stale)} to process")
+            inputs = stale
+        
+        results = {"success": [], "failed": []}
+        if inputs:
+            print(f"Processing {len(inputs)} sheets with {min(args.jobs or os.cpu_count() or 1, len(inputs))} workers")
+            results = process_batch(inputs, args.out_dir, args.jobs, keying=args.keying,
+                                    max_bytes=args.max_bytes, profile=args.profile,
+                                    raw_store=args.raw_store, **settings)
+        
+        if cache:
+            for src in inputs:
+                if src.name in results["success"]:
+                    for scale in args.scales:
+                        cache.record(scaled_output_path(batch_output_path(src, args.out_dir, args.format), scale),
+                                     keys[src.name], src)
+            cache.save()
+        
+        if args.profile and results["success"]:
+            profiles = [profile_output_path(batch_output_path(src, args.out_dir, args.format))
+                        for src in inputs if src.name in results["success"]]
+            summary = summarize_profiles(profiles)
+            summary_path = args.out_dir / "profile-summary.json"
+            summary_path.write_text(json.dumps(summary, indent=2))
+            print(f"Profile summary ({summary['sheets']} sheets, {summary['wall_s']:.2f}s total):")
+            for name, agg in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["wall_s"]):
+                print(f"  {name:<12} {agg['wall_s']:8.3f}s  {agg['share'] * 100:5.1f}%")
+            print(f"Dominant stage: {summary['dominant_stage']}, written to {summary_path}")
+        
+        print(f"Done: {len(results['success'])} succeeded, {len(results['failed'])} failed")
+        for name in sorted(results["failed"]):
+            print(f"  - {name}")
+        return 1 if results["failed"] else 0
+    
+    if not (args.input and args.output):
         print("Usage: python3 process_sprite.py <input.png> <output.png>")
-        sys.exit(1)
+        print("       python3 process_sprite.py --batch <dir-or-glob> --out-dir <dir> [--jobs N]")
+        return 1
+    try:
+        check_output_suffix(args.output, args.format)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
     
-    success = process_sprite_sheet(sys.argv[1], sys.argv[2])
-    sys.exit(0 if success else 1)
+    success = process_sprite_sheet(args.input, args.output, keying=args.keying,
+                                   max_bytes=args.max_bytes, profile=args.profile,
+                                   raw_store=args.raw_store, **processing_settings(args))
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
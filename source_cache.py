@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Persistent per-file cache for the static analyzers.
+
+Each analyzer's result for a source file is stored under the SHA-256 of the
+file's contents, so a re-check after editing one script only re-analyzes
+that script; everything else is read back from the cache and the cross-file
+checks are recomputed from the cached facts. Results are also tied to a hash
+of the analyzer's own code, so editing an analyzer invalidates its entries.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+from sprite_cache import file_digest
+
+DEFAULT_CACHE = Path(".source-cache.json")
+CACHE_VERSION = 1
+
+def analyzer_version(analyze, *deps: Path) -> str:
+    """Hash of the file defining analyze plus any modules it relies on."""
+    digest = hashlib.sha256()
+    for path in (Path(inspect.getsourcefile(analyze)), *deps):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+class SourceCache:
+    """JSON file mapping analyzer -> source content hash -> analyzer result."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE):
+        self.path = Path(path)
+        self.digests = {}
+        self.analyzers = {}
+        self.hits = 0
+        self._pending = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except ValueError:
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self.digests = data.get("digests", {})
+                self.analyzers = data.get("analyzers", {})
+
+    def _entries(self, analyze, version: str) -> dict:
+        slot = self.analyzers.get(analyze.__name__)
+        if slot is None or slot["version"] != version:
+            # The analyzer changed; everything it produced before is stale
+            slot = self.analyzers[analyze.__name__] = {"version": version, "results": {}}
+        return slot["results"]
+
+    def digest(self, path: Path) -> str:
+        """Hash a source, reusing the stored digest while size and mtime are unchanged."""
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self.digests.get(str(path))
+        if known and known["stat"] == stamp:
+            return known["sha256"]
+        digest = file_digest(path)
+        # Recorded by put once the analyzed bytes are known to match
+        self._pending[str(path)] = {"stat": stamp, "sha256": digest}
+        return digest
+
+    def get(self, analyze, version: str, path: Path):
+        """The cached result for path's current contents, or None."""
+        result = self._entries(analyze, version).get(self.digest(path))
+        if result is not None:
+            self.hits += 1
+            pending = self._pending.pop(str(path), None)
+            if pending:
+                self.digests[str(path)] = pending
+        return result
+
+    def put(self, analyze, version: str, path: Path, digest: str, result):
+        """Store result for the contents that hashed to digest."""
+        self._entries(analyze, version)[digest] = result
+        pending = self._pending.pop(str(path), None)
+        # Only trust the stat stamp if the file didn't change between stat and analysis
+        if pending and pending["sha256"] == digest:
+            self.digests[str(path)] = pending
+
+    def save(self):
+        """Drop results for files and contents no longer on disk, then write atomically."""
+        self.digests = {p: entry for p, entry in self.digests.items() if os.path.exists(p)}
+        live = {entry["sha256"] for entry in self.digests.values()}
+        for slot in self.analyzers.values():
+            slot["results"] = {d: r for d, r in slot["results"].items() if d in live}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps({"version": CACHE_VERSION, "digests": self.digests,
+                                        "analyzers": self.analyzers}, sort_keys=True))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Single-pass scanner for the game's HTML/JS sources, and the file-set
+plumbing the static analyzers share.
+
+The source is split once into word and single-character tokens
+and every metric test_game.py reports is updated from that one stream with
+a few tokens of look-behind and one token of look-ahead. This replaces a
+separate full-text regex pass per metric (two dozen of them, some
+backtracking-prone). Counts match what those regexes found on the raw text,
+markup, comments and strings included.
+
+extract_facts adds what the cross-file checks need (functions, globals,
+listeners, timers, sprite references); analyze_files can serve any of these
+per-file results from a SourceCache keyed by content hash.
+
+find_sources/analyze_files let test_game.py, test-game-modes.py and
+test_sprites.py take any mix of files, directories and globs (default: every
+.html/.js in the current directory) and analyze them in a process pool,
+largest first, so a full-repo check takes about as long as game.js alone.
+"""
+
+import bisect
+import glob
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from source_cache import SourceCache, analyzer_version
+
+# Whitespace is folded into the token that follows it
+TOKEN_RE = re.compile(r"\s*(?:(\w+)|(.))", re.S)
+WORD, OTHER = 1, 2
+ASCII_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+ERROR_PATTERNS = {
+    "getElementById": 'Potential null reference: getElementById without null check',
+    "length_minus_one": 'Array access without bounds check',
+    "parseInt": 'parseInt without radix parameter',
+    "eq_null": 'Use === for null comparison',
+    "ne_null": 'Use !== for null comparison',
+    "src_literal": 'Direct image src assignment (check for loading errors)',
+    "random_scaling": 'Math.random() scaling without Math.floor',
+}
+
+# keyword -> characters that may follow it (after optional whitespace) to count as an operation
+SCORING_KEYWORDS = ['score', 'point', 'game', 'set', 'match', 'deuce', 'advantage']
+PHYSICS_KEYWORDS = ['velocity', 'position', 'bounce', 'gravity', 'friction']
+SPRITE_KEYWORDS = ['sprite', 'animation', 'frame']
+KEYWORD_GROUPS = (
+    ("scoring", SCORING_KEYWORDS, "=+-"),
+    ("physics", PHYSICS_KEYWORDS, "=+-*"),
+    ("sprite", SPRITE_KEYWORDS, "=."),
+)
+
+PERF_CALLS = ['setInterval', 'getBoundingClientRect', 'querySelector']
+MOBILE_FEATURES = ['touch', 'pointer', 'orientation', 'viewport', 'devicePixelRatio']
+ERROR_HANDLING = ['try', 'catch', 'finally', 'throw', 'Error']
+
+def trailing_letters(word: str) -> str:
+    """The run of ASCII letters at the end of word ('' if it ends in a digit or _)."""
+    i = len(word)
+    while i and word[i - 1] in ASCII_LETTERS:
+        i -= 1
+    return word[i:]
+
+def word_facts(word: str) -> tuple:
+    """Per-word results that don't depend on context, computed once per distinct word."""
+    tail = trailing_letters(word).lower()
+    hits = [[kw for kw in words if kw in tail] for _, words, _ in KEYWORD_GROUPS] if tail else None
+    lowered = word.lower()
+    mobile = [f for f in MOBILE_FEATURES if f.lower() in lowered]
+    perf = [(call, word.count(call)) for call in PERF_CALLS if call in word]
+    return (hits if hits and any(hits) else None), mobile, perf
+
+def scan_source(text: str) -> dict:
+    """Walk text once and return every test_game.py metric."""
+    errors = dict.fromkeys(ERROR_PATTERNS, 0)
+    keywords = {group: dict.fromkeys(words, 0) for group, words, _ in KEYWORD_GROUPS}
+    perf = dict.fromkeys(PERF_CALLS, 0)
+    mobile = set()
+    handling = dict.fromkeys(ERROR_HANDLING, 0)
+    facts = {}
+
+    recent = []            # last few significant tokens: (kind, text, preceded_by_space)
+    keyword_hits = None    # per-group keywords in the last word, waiting for the next token
+    length_pending = False # ".length - 1]" seen; counts unless followed by > < =
+    random_pending = False # "Math.random() * D" seen; counts unless followed by . , )
+    random_star = False    # "Math.random() *" seen; next token decides
+    gebi_stage = 0         # 1: inside getElementById( ... 2: just closed  3: closed and dotted
+    parse_start = None     # offset just past the earliest open parseInt(
+    src_pending = False    # ".src = '" seen, waiting for the closing quote
+    word_open = None       # word that may open a call if followed directly by "("
+
+    for m in TOKEN_RE.finditer(text):
+        kind = m.lastindex
+        tok = m.group(kind)
+        start = m.start(kind)
+        spaced = start != m.start()
+
+        # Resolve look-ahead from the previous significant token
+        if keyword_hits:
+            for (group, _, follow), hits in zip(KEYWORD_GROUPS, keyword_hits):
+                if kind == OTHER and tok in follow:
+                    for kw in hits:
+                        keywords[group][kw] += 1
+            keyword_hits = None
+        if length_pending:
+            if not (kind == OTHER and tok in "><="):
+                errors["length_minus_one"] += 1
+            length_pending = False
+        if random_pending:
+            if not (kind == OTHER and tok in ".,)"):
+                errors["random_scaling"] += 1
+            random_pending = False
+        if random_star:
+            random_star = False
+            if kind == WORD and tok[0].isdecimal():
+                # A second character (digit or letter) already satisfies the look-ahead
+                if len(tok) > 1:
+                    errors["random_scaling"] += 1
+                else:
+                    random_pending = True
+
+        # getElementById(...).x: every open call shares the first ")" that follows
+        consumed_first = False
+        if gebi_stage == 2:
+            gebi_stage = 3 if (kind == OTHER and tok == "." and not spaced) else 0
+        elif gebi_stage == 3:
+            if kind == WORD and tok[0] in ASCII_LETTERS and not spaced:
+                errors["getElementById"] += 1
+                consumed_first = True
+            gebi_stage = 0
+        elif gebi_stage == 1 and kind == OTHER and tok == ")":
+            gebi_stage = 2
+
+        if kind == WORD:
+            info = facts.get(tok)
+            if info is None:
+                info = facts[tok] = word_facts(tok)
+            keyword_hits, word_mobile, word_perf = info
+            mobile.update(word_mobile)
+            for call, count in word_perf:
+                perf[call] += count
+            if tok in handling:
+                handling[tok] += 1
+            if tok.startswith("null"):
+                before = m.start()
+                op = text[before - 2:before]
+                if op == "==":
+                    errors["eq_null"] += 1
+                elif op == "!=":
+                    errors["ne_null"] += 1
+            # The match above consumed this word's first letter
+            word_open = tok[1:] if consumed_first else tok
+        else:
+            if tok == "(" and not spaced and word_open is not None:
+                if word_open.endswith("getElementById") and gebi_stage == 0:
+                    gebi_stage = 1
+                if word_open.endswith("parseInt") and parse_start is None:
+                    parse_start = m.end()
+            elif tok == ",":
+                parse_start = None
+            elif tok == ")":
+                if parse_start is not None and start > parse_start:
+                    errors["parseInt"] += 1
+                parse_start = None
+            elif tok in "'\"":
+                if src_pending:
+                    errors["src_literal"] += 1
+                    src_pending = False
+                elif (len(recent) >= 3 and recent[-1][1] == "=" and recent[-2][1] == "src"
+                      and recent[-2][0] == WORD and not recent[-2][2] and recent[-3][1] == "."):
+                    src_pending = True
+            elif tok == "]":
+                if (len(recent) >= 4 and recent[-1][1] == "1" and recent[-2][1] == "-"
+                        and recent[-3][1] == "length" and not recent[-3][2] and recent[-4][1] == "."):
+                    length_pending = True
+            elif tok == "*":
+                if (len(recent) >= 5 and recent[-1][1] == ")" and recent[-2][1] == "("
+                        and recent[-3][1] == "random" and recent[-4][1] == "."
+                        and recent[-5][0] == WORD and recent[-5][1].endswith("Math")
+                        and not any(t[2] for t in recent[-4:])):
+                    random_star = True
+            word_open = None
+
+        recent.append((kind, tok, spaced))
+        if len(recent) > 6:
+            del recent[0]
+
+    # Look-aheads that reach the end of the text succeed
+    if length_pending:
+        errors["length_minus_one"] += 1
+    if random_pending:
+        errors["random_scaling"] += 1
+
+    return {"errors": errors, "keywords": keywords, "perf": perf,
+            "mobile": [f for f in MOBILE_FEATURES if f in mobile], "error_handling": handling}
+
+def merge_stats(results: list[dict]) -> dict:
+    """Combine scan_source results from several files into one."""
+    merged = scan_source("")
+    for stats in results:
+        for section in ("errors", "perf", "error_handling"):
+            for key, count in stats[section].items():
+                merged[section][key] += count
+        for group, counts in stats["keywords"].items():
+            for keyword, count in counts.items():
+                merged["keywords"][group][keyword] += count
+    found = {f for stats in results for f in stats["mobile"]}
+    merged["mobile"] = [f for f in MOBILE_FEATURES if f in found]
+    return merged
+
+IDENT = r"[A-Za-z_$][\w$]*"
+FUNCTION_RE = re.compile(rf"\bfunction\s*\*?\s*({IDENT})\s*\("
+                         rf"|\b(?:const|let|var)\s+({IDENT})\s*=\s*(?:async\s+)?"
+                         rf"(?:function\b|(?:\([^()]*\)|{IDENT})\s*=>)")
+# Unindented declarations (top level of a .js file) and explicit window.x assignments
+GLOBAL_RE = re.compile(rf"^(?:var|let|const|function|class)\s+({IDENT})|\bwindow\.({IDENT})\s*=(?![=>])", re.M)
+LISTENER_RE = re.compile(r"""\b(add|remove)EventListener\(\s*['"`]([\w:-]+)['"`]""")
+TIMER_CALLS = ['setInterval', 'clearInterval', 'setTimeout', 'clearTimeout',
+               'requestAnimationFrame', 'cancelAnimationFrame']
+TIMER_RE = re.compile(rf"\b({'|'.join(TIMER_CALLS)})\s*\(")
+# An optional "+" before the quote marks a fragment glued onto a computed prefix
+SPRITE_RE = re.compile(r"""(\+\s*)?(['"`])([^'"`\s]*\.(?:png|webp|jpe?g|gif))\2""")
+
+def extract_facts(text: str) -> dict:
+    """scan_source's metrics plus the per-file facts the cross-file checks need.
+
+    Everything is plain JSON so it can live in a SourceCache.
+    """
+    newlines = [m.start() for m in re.finditer("\n", text)]
+
+    def line(offset: int) -> int:
+        return bisect.bisect_right(newlines, offset) + 1
+
+    def by_name(pattern: re.Pattern) -> dict[str, list[int]]:
+        found = {}
+        for m in pattern.finditer(text):
+            found.setdefault(m.group(m.lastindex), []).append(line(m.start()))
+        return found
+
+    listeners = {"add": Counter(), "remove": Counter()}
+    for m in LISTENER_RE.finditer(text):
+        listeners[m.group(1)][m.group(2)] += 1
+    return {
+        "stats": scan_source(text),
+        "functions": by_name(FUNCTION_RE),
+        "globals": by_name(GLOBAL_RE),
+        "listeners": {kind: dict(counts) for kind, counts in listeners.items()},
+        "timers": dict(Counter(m.group(1) for m in TIMER_RE.finditer(text))),
+        "sprites": [[m.group(3), line(m.start(3))] for m in SPRITE_RE.finditer(text)
+                    if not m.group(1) and "${" not in m.group(3)],
+    }
+
+def cross_file_checks(facts: dict[Path, dict]) -> dict:
+    """Checks that need every file's facts at once; cheap, so always recomputed."""
+    def defined_in_several(kind: str) -> dict[str, list[str]]:
+        sites = {}
+        for path, f in facts.items():
+            for name, lines in f[kind].items():
+                sites.setdefault(name, []).extend(f"{path}:{lineno}" for lineno in lines)
+        return {name: where for name, where in sorted(sites.items()) if len(where) > 1}
+
+    timers = Counter()
+    added, removed = Counter(), Counter()
+    for f in facts.values():
+        timers.update(f["timers"])
+        added.update(f["listeners"]["add"])
+        removed.update(f["listeners"]["remove"])
+    missing_sprites = [f"{path}:{lineno} {ref}" for path, f in facts.items() for ref, lineno in f["sprites"]
+                       if "://" not in ref and not (Path(path).parent / ref.split("?")[0]).exists()]
+    return {
+        "duplicate_functions": defined_in_several("functions"),
+        "shared_globals": defined_in_several("globals"),
+        "timers": {call: timers[call] for call in TIMER_CALLS},
+        "unremoved_listeners": {event: n for event, n in sorted(added.items()) if not removed[event]},
+        "missing_sprites": missing_sprites,
+    }
+
+SOURCE_PATTERNS = ("*.html", "*.js")
+
+def find_sources(specs: list[str] | None = None) -> list[Path]:
+    """Expand files, directories and globs into source files; default: every .html/.js here."""
+    paths = []
+    for spec in specs or ["."]:
+        path = Path(spec)
+        if path.is_dir():
+            for pattern in SOURCE_PATTERNS:
+                paths.extend(sorted(path.glob(pattern)))
+        elif glob.has_magic(spec):
+            paths.extend(Path(p) for p in sorted(glob.glob(spec)))
+        else:
+            paths.append(path)
+    return list(dict.fromkeys(paths))
+
+def analyze_path(analyze, path: Path) -> tuple[str, object]:
+    """(SHA-256 of the bytes analyzed, analyze(text)) for one file."""
+    data = path.read_bytes()
+    return hashlib.sha256(data).hexdigest(), analyze(data.decode(errors="replace"))
+
+def analyze_files(paths: list[Path], analyze, jobs: int | None = None,
+                  cache: SourceCache | None = None, deps: list[Path] | None = None) -> dict[Path, object]:
+    """Run analyze(text) on every file, concurrently, returning results in input order.
+
+    analyze must be a module-level function so worker processes can import it.
+    With a cache, files whose contents were analyzed before are not read again;
+    deps are the other modules analyze calls into, hashed with it so editing
+    them invalidates its cached results too.
+    """
+    results = {}
+    if cache is not None:
+        version = analyzer_version(analyze, Path(__file__), *(deps or []))
+        for path in paths:
+            hit = cache.get(analyze, version, path)
+            if hit is not None:
+                results[path] = hit
+    todo = [path for path in paths if path not in results]
+
+    workers = min(jobs or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        fresh = {path: analyze_path(analyze, path) for path in todo}
+    else:
+        # Largest first: the biggest file bounds the wall time, so start it immediately
+        ordered = sorted(todo, key=lambda p: os.stat(p).st_size, reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(analyze_path, analyze, path) for path in ordered}
+            fresh = {path: futures[path].result() for path in todo}
+
+    for path, (digest, result) in fresh.items():
+        results[path] = result
+        if cache is not None:
+            cache.put(analyze, version, path, digest, result)
+    if cache is not None:
+        cache.save()
+    return {path: results[path] for path in paths}
@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+#     "numpy>=1.24.0",
+# ]
+# ///
+"""
+Manifest-driven incremental build for all sprite assets.
+
+sprites.json declares characters × animations per roster, and where each
+roster's raw sheets, processed sheets and atlas live. This script turns it
+into a dependency graph (reference → raw → sheet → atlas), works out which
+nodes are stale, and rebuilds only those, make-style and in parallel:
+generation under the provider rate limit, processing on warm workers, and
+each node starting as soon as its own dependencies are done. Generation
+pauses while --queue-size raws are waiting to be processed.
+
+Every generated raw is validated (geometry, per-cell background coverage,
+frame-to-frame consistency) before anything else touches it; a rejected raw
+is moved aside as *.rejected.png and requeued for generation, at most
+validate.max_requeues times.
+
+Queue wait and latency per stage, plus outcome counts, are written at the
+end of each run as a Prometheus textfile and a JSON summary.
+
+Staleness:
+- raw: missing, unless its processed sheet exists (regenerating is a paid
+  call, so a wiped raw/ directory is not a reason to regenerate). Missing
+  raws are restored from the generation cache when the same prompt,
+  reference, resolution and model were generated before.
+- sheet: raw hash or processing settings differ from the cache manifest.
+  If the raw is gone, its last recorded hash is used; an out-of-date sheet
+  then gets its raw restored from the generation cache, or is reported as
+  stale but unbuildable.
+- atlas: any input sheet changed since the atlas was packed
+
+Generating raws needs the provider API key in GEMINI_API_KEY (not with --stub).
+
+Usage:
+    sprite_build.py                    # build everything that is stale
+    sprite_build.py characters         # one roster (plus what it depends on)
+    sprite_build.py sheet:goth-back-run atlas
+    sprite_build.py --dry-run          # show the plan without building
+    sprite_build.py --stub             # offline, synthetic generations
+    sprite_build.py --watch            # rebuild sheets as raws are dropped or edited
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sprite_cache import GenerationCache, ProcessCache, cache_key, generation_key
+from sprite_journal import JobJournal
+from sprite_metrics import NO_METRICS, PipelineMetrics, timed_call
+from sprite_scheduler import (GenerationJob, RetryPolicy, TokenBucket, cli_generator,
+                              generate_with_retry, stub_generator)
+
+BASE_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = BASE_DIR / "sprites.json"
+SKILL_SCRIPT = "/opt/homebrew/lib/node_modules/openclaw/skills/nano-banana-pro/scripts/generate_image.py"
+PROCESS_SCRIPT = BASE_DIR / "process_sprite.py"
+PROCESS_TIMEOUT = 60  # seconds of processing per sheet, not counting time queued for a worker
+
+@dataclass
+class Node:
+    id: str
+    name: str  # journal job name, shared by a raw and the sheet built from it
+    kind: str  # "raw", "sheet" or "atlas"
+    output: Path
+    roster: str | None = None
+    deps: list[str] = field(default_factory=list)
+    job: GenerationJob | None = None
+    inputs: list[Path] = field(default_factory=list)
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    return json.loads(Path(path).read_text())
+
+def render_prompt(manifest: dict, char: str, anim: str) -> str:
+    return manifest["prompt"].format(desc=manifest["characters"][char], **manifest["animations"][anim])
+
+def build_graph(manifest: dict, base_dir: Path = BASE_DIR) -> dict[str, Node]:
+    """Expand rosters into raw/sheet nodes plus the atlas, wiring dependencies."""
+    nodes = {}
+    for roster_name, roster in manifest["rosters"].items():
+        for char in roster["characters"]:
+            for anim in roster["animations"]:
+                raw_path = base_dir / roster["raw"].format(char=char, anim=anim)
+                reference = base_dir / roster["reference"].format(char=char, anim=anim)
+                sheet_path = base_dir / roster["sheet"].format(char=char, anim=anim) if "sheet" in roster else None
+                # Named after the final output, so the same char/anim in two rosters can't collide
+                name = (sheet_path or raw_path).stem
+                job = GenerationJob(name, render_prompt(manifest, char, anim), raw_path, reference, sheet_path)
+                nodes[f"raw:{name}"] = Node(f"raw:{name}", name, "raw", raw_path, roster_name, job=job)
+                if sheet_path:
+                    nodes[f"sheet:{name}"] = Node(f"sheet:{name}", name, "sheet", sheet_path, roster_name,
+                                                  deps=[f"raw:{name}"])
+
+    # A raw generated from another node's output (e.g. a processed sheet as reference) waits for it
+    by_output = {node.output: node.id for node in nodes.values()}
+    for node in nodes.values():
+        if node.kind == "raw" and node.job.reference in by_output:
+            node.deps.append(by_output[node.job.reference])
+
+    atlas = manifest.get("atlas")
+    if atlas:
+        sheets = [node for node in nodes.values() if node.kind == "sheet" and node.roster in atlas["rosters"]]
+        out_dir = base_dir / atlas["out_dir"]
+        nodes["atlas"] = Node("atlas", "atlas", "atlas", out_dir / "atlas.json", deps=[n.id for n in sheets],
+                              inputs=[n.output for n in sheets])
+    return nodes
+
+def select_nodes(nodes: dict[str, Node], targets: list[str]) -> set[str]:
+    """Targets (node ids or roster names) plus everything they depend on."""
+    if not targets:
+        return set(nodes)
+    wanted = []
+    for target in targets:
+        if target in nodes:
+            wanted.append(target)
+            continue
+        matched = [node.id for node in nodes.values() if node.roster == target]
+        if not matched:
+            raise SystemExit(f"Unknown target: {target}")
+        wanted.extend(matched)
+    selected = set()
+    stack = list(wanted)
+    while stack:
+        node_id = stack.pop()
+        if node_id not in selected:
+            selected.add(node_id)
+            stack.extend(nodes[node_id].deps)
+    return selected
+
+def topo_order(nodes: dict[str, Node], selected: set[str]) -> list[str]:
+    order, seen = [], set()
+
+    def visit(node_id: str):
+        if node_id in seen:
+            return
+        seen.add(node_id)
+        for dep in nodes[node_id].deps:
+            if dep in selected:
+                visit(dep)
+        order.append(node_id)
+
+    for node_id in sorted(selected):
+        visit(node_id)
+    return order
+
+def atlas_key(node: Node, cache: ProcessCache, settings: dict) -> str | None:
+    """Cache key over the digests of every input sheet; None if any is missing."""
+    if not all(path.exists() for path in node.inputs):
+        return None
+    combined = hashlib.sha256()
+    for path in node.inputs:
+        combined.update(f"{path.name}:{cache.raw_digest(path)}\n".encode())
+    return cache_key(combined.hexdigest(), settings)
+
+def generation_key_for(job: GenerationJob, manifest: dict, cache: ProcessCache) -> str:
+    """Generation cache key: prompt, reference bytes, resolution and model."""
+    generation = manifest["generation"]
+    return generation_key(job.prompt, cache.raw_digest(job.reference), generation["resolution"], generation["model"])
+
+def recorded_key(raw_path: Path, cache: ProcessCache, settings: dict) -> str | None:
+    """Sheet cache key for a raw, from its last recorded digest if the file is gone; None if never seen."""
+    if raw_path.exists():
+        return cache.key_for(raw_path, settings)
+    known = cache.digests.get(str(raw_path))
+    return cache_key(known["sha256"], settings) if known else None
+
+def plan(nodes: dict[str, Node], selected: set[str], manifest: dict, cache: ProcessCache,
+         resumed: dict[str, dict] | None = None, generations: GenerationCache | None = None) -> dict[str, str]:
+    """Map each stale node id to the reason it needs rebuilding."""
+    settings = process_settings(manifest)
+    resumed = resumed or {}
+    stale = {}
+    for node_id in topo_order(nodes, selected):
+        node = nodes[node_id]
+        stale_deps = [dep for dep in node.deps if dep in stale]
+        journal_state = resumed.get(node.name, {}).get("state")
+
+        if node.kind == "raw":
+            sheet = nodes.get(f"sheet:{node.name}")
+            if journal_state in ("generated", "processed"):
+                continue
+            # Raws are never regenerated because their reference changed; only when absent
+            if not node.output.exists():
+                cached = (generations is not None and node.job.reference.exists()
+                          and generation_key_for(node.job, manifest, cache) in generations.entries)
+                if not (sheet and sheet.output.exists()):
+                    stale[node_id] = "missing (cached)" if cached else "missing"
+                elif cached:
+                    # Restoring is free, so do it when the sheet needs reprocessing (e.g. new settings)
+                    key = recorded_key(node.output, cache, settings)
+                    if key is not None and not cache.is_fresh(sheet.output, key):
+                        stale[node_id] = "missing (cached)"
+        elif node.kind == "sheet":
+            raw = nodes[node.deps[0]]
+            if journal_state == "processed":
+                continue
+            if stale_deps:
+                stale[node_id] = "raw rebuilt"
+            elif not raw.output.exists():
+                # Sheet exists without its raw, and no cached generation to restore it from
+                key = recorded_key(raw.output, cache, settings)
+                if key is not None and not cache.is_fresh(node.output, key):
+                    stale[node_id] = "raw or settings changed, raw missing (unbuildable)"
+            elif not cache.is_fresh(node.output, cache.key_for(raw.output, settings)):
+                stale[node_id] = "missing" if not node.output.exists() else "raw or settings changed"
+        elif node.kind == "atlas":
+            if stale_deps:
+                stale[node_id] = f"{len(stale_deps)} sheets rebuilt"
+            else:
+                key = atlas_key(node, cache, manifest["atlas"])
+                if key is None or not cache.is_fresh(node.output, key):
+                    stale[node_id] = "sheets changed" if node.output.exists() else "missing"
+    return stale
+
+def run_fingerprint(manifest: dict) -> str:
+    """Hash of the whole manifest; --resume only trusts journal runs made with the same one."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+def process_settings(manifest: dict) -> dict:
+    """Settings that affect processed pixels (everything but the byte budget)."""
+    return {k: v for k, v in manifest["process"].items() if k != "max_bytes"}
+
+def validate_settings(manifest: dict) -> dict:
+    """validate_raw_sheet keywords (everything but the requeue budget)."""
+    return {k: v for k, v in manifest["validate"].items() if k != "max_requeues"}
+
+def warm_worker():
+    """Pool initializer: pay for the NumPy/Pillow import once per worker."""
+    import process_sprite  # noqa: F401
+
+def process_sheet(raw_path: Path, sheet_path: Path, manifest: dict, pool: ProcessPoolExecutor | None,
+                  metrics: PipelineMetrics = NO_METRICS) -> bool:
+    """Process one raw sheet on a warm worker, or in a `uv run` subprocess when pool is None."""
+    settings = process_settings(manifest)
+    max_bytes = manifest["process"].get("max_bytes")
+    if pool is not None:
+        from process_sprite import process_sprite_sheet
+        future = pool.submit(timed_call, time.time(), process_sprite_sheet, str(raw_path), str(sheet_path),
+                             run_timeout=PROCESS_TIMEOUT, max_bytes=max_bytes, **settings)
+        wait, duration, ok = future.result()
+        metrics.observe("process_wait", wait)
+        metrics.observe("process", duration)
+        return ok
+
+    from process_sprite import settings_argv
+
+    # Same keywords as the pool path; a setting with no CLI flag raises instead of being dropped
+    cmd = ["uv", "run", str(PROCESS_SCRIPT), str(raw_path), str(sheet_path),
+           *settings_argv({**settings, "max_bytes": max_bytes})]
+    with metrics.timer("process"):
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=PROCESS_TIMEOUT)
+    if result.returncode != 0:
+        print(f"    ✗ Process error: {result.stderr.strip()[:200]}")
+    return result.returncode == 0
+
+def validate_raw(raw_path: Path, manifest: dict) -> list[str]:
+    """Header and sampled-pixel checks from process_sprite.validate_raw_sheet."""
+    from process_sprite import validate_raw_sheet
+
+    settings = manifest["process"]
+    return validate_raw_sheet(str(raw_path), grid_cols=settings["grid_cols"], grid_rows=settings["grid_rows"],
+                              threshold=settings["threshold"], tolerance=settings["tolerance"],
+                              **validate_settings(manifest))
+
+def pack_atlas_node(node: Node, manifest: dict) -> bool:
+    from pack_atlas import pack_atlas
+
+    atlas = manifest["atlas"]
+    pack_atlas(node.inputs, node.output.parent, atlas["max_size"], atlas["padding"], atlas["frame_width"])
+    return True
+
+async def execute(nodes: dict[str, Node], selected: set[str], stale: dict[str, str], manifest: dict,
+                  cache: ProcessCache, generate, bucket: TokenBucket, concurrency: int,
+                  retry: RetryPolicy, journal: JobJournal, pool: ProcessPoolExecutor | None,
+                  generations: GenerationCache | None = None, metrics: PipelineMetrics = NO_METRICS,
+                  queue_size: int = 8) -> dict:
+    """Run every stale node once all of its dependencies have succeeded.
+
+    At most queue_size raws sit generated but unprocessed; past that,
+    generation waits for processing to catch up.
+    """
+    results = {"built": [], "failed": [], "skipped": []}
+    semaphore = asyncio.Semaphore(concurrency)
+    backlog = asyncio.Semaphore(queue_size)
+    holding = set()  # raws holding a backlog slot until their sheet is processed
+    cache_lock = threading.Lock()
+    settings = process_settings(manifest)
+    tasks: dict[str, asyncio.Task] = {}
+    validated = set()
+
+    def check_raw(raw_path: Path) -> list[str]:
+        with metrics.timer("validate"):
+            problems = validate_raw(raw_path, manifest)
+        metrics.count("validate", "reject" if problems else "pass")
+        return problems
+
+    def finish_sheet(node: Node) -> bool:
+        raw_path = nodes[node.deps[0]].output
+        if not raw_path.exists():
+            print(f"    ✗ {node.name}: out of date but {raw_path.name} is missing; restore or regenerate it")
+            return False
+        # Keyed before the raw is read, so a raw replaced mid-build leaves the sheet stale
+        with cache_lock:
+            key = cache.key_for(raw_path, settings)
+        if raw_path not in validated:
+            problems = check_raw(raw_path)
+            if problems:
+                print(f"    ✗ {node.name}: invalid raw: {'; '.join(problems)}")
+                return False
+        ok = process_sheet(raw_path, node.output, manifest, pool, metrics)
+        metrics.count("process", "success" if ok else "failure")
+        if not ok:
+            return False
+        with cache_lock:
+            cache.record(node.output, key, raw_path)
+            cache.save()
+        return True
+
+    def restore_raw(node: Node) -> bool:
+        if generations is None:
+            return False
+        with cache_lock:
+            key = generation_key_for(node.job, manifest, cache)
+            if not generations.get(key, node.output):
+                return False
+            generations.save()
+        return True
+
+    def store_raw(node: Node):
+        if generations is None:
+            return
+        with cache_lock:
+            generations.put(generation_key_for(node.job, manifest, cache), node.output)
+            generations.save()
+
+    async def build_raw(node: Node) -> bool:
+        """Restore or generate a raw, requeueing it while it fails validation.
+
+        Each generation already retries on its own, so requeues get a separate
+        budget (validate.max_requeues); a rejected cached restore doesn't use it.
+        """
+        max_requeues = manifest["validate"].get("max_requeues", 1)
+        restored = await asyncio.to_thread(restore_raw, node)
+        attempt = requeues = 0
+        while True:
+            attempt += 1
+            if restored:
+                metrics.count("generate", "cached")
+                print(f"    ✓ {node.name}: restored from generation cache")
+                journal.record(node.name, "generated", cached=True)
+            elif not await generate_with_retry(node.job, generate, semaphore, bucket, retry, journal, metrics):
+                return False
+            problems = await asyncio.to_thread(check_raw, node.output)
+            if not problems:
+                validated.add(node.output)
+                if not restored:
+                    await asyncio.to_thread(store_raw, node)
+                return True
+
+            # Keep the bad sheet around for inspection, but out of the build's way
+            node.output.replace(node.output.with_suffix(".rejected.png"))
+            if restored and generations is not None:
+                with cache_lock:
+                    generations.discard(generation_key_for(node.job, manifest, cache))
+                    generations.save()
+            requeue = restored or requeues < max_requeues
+            print(f"    ✗ {node.name}: rejected ({'; '.join(problems)})" + (", requeueing" if requeue else ""))
+            journal.record(node.name, "failed", attempt=attempt, error=f"invalid: {'; '.join(problems)}",
+                           stage="validate")
+            if not requeue:
+                return False
+            if not restored:
+                requeues += 1
+            restored = False
+
+    def finish_atlas(node: Node) -> bool:
+        with metrics.timer("atlas"):
+            pack_atlas_node(node, manifest)
+        metrics.count("atlas", "success")
+        with cache_lock:
+            cache.record(node.output, atlas_key(node, cache, manifest["atlas"]))
+            cache.save()
+        return True
+
+    def release(name: str):
+        if name in holding:
+            holding.discard(name)
+            backlog.release()
+
+    async def run(node: Node) -> bool:
+        deps_ok = await asyncio.gather(*(tasks[dep] for dep in node.deps if dep in tasks))
+        if not all(deps_ok):
+            print(f"  ✗ {node.id}: dependency failed")
+            results["failed"].append(node.id)
+            return False
+        if node.id not in stale:
+            return True
+
+        if node.kind == "raw" and f"sheet:{node.name}" in stale:
+            with metrics.timer("backlog_wait"):
+                await backlog.acquire()
+            holding.add(node.name)
+        start = time.monotonic()
+        try:
+            if node.kind == "raw":
+                ok = await build_raw(node)
+            elif node.kind == "sheet":
+                ok = await asyncio.to_thread(finish_sheet, node)
+            else:
+                ok = await asyncio.to_thread(finish_atlas, node)
+            error = None if ok else f"{node.kind} failed"
+        except Exception as e:
+            print(f"  ✗ {node.id}: {e}")
+            ok, error = False, f"exception: {e}"
+        # A raw frees its slot once its sheet is done, or right away if there won't be one
+        if node.kind == "sheet" or not ok:
+            release(node.name)
+
+        if node.kind != "raw":
+            if ok:
+                journal.record(node.name, "processed", duration_s=time.monotonic() - start)
+            else:
+                journal.record(node.name, "failed", duration_s=time.monotonic() - start,
+                               error=error, stage=node.kind)
+        results["built" if ok else "failed"].append(node.id)
+        return ok
+
+    queued = set()
+    for node_id in topo_order(nodes, selected):
+        node = nodes[node_id]
+        if node_id in stale and node.name not in queued:
+            journal.record(node.name, "queued")
+            queued.add(node.name)
+        tasks[node_id] = asyncio.ensure_future(run(node))
+    await asyncio.gather(*tasks.values())
+    results["skipped"] = sorted(selected - set(results["built"]) - set(results["failed"]))
+    return results
+
+def stat_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def rebuild_sheets(sheets: list[Node], nodes: dict[str, Node], manifest: dict, cache: ProcessCache,
+                   pool: ProcessPoolExecutor) -> list[Node]:
+    """Validate and process sheets concurrently on the warm pool; return the ones rebuilt."""
+    from process_sprite import process_sprite_sheet, validate_raw_sheet
+
+    settings = process_settings(manifest)
+    raw_of = {sheet.id: nodes[sheet.deps[0]].output for sheet in sheets}
+    keys, checks = {}, {}
+    for sheet in sheets:
+        # Keyed before any worker reads the raw: a save landing mid-rebuild must not be recorded as built
+        try:
+            keys[sheet.id] = cache.key_for(raw_of[sheet.id], settings)
+        except OSError as e:
+            print(f"  ✗ {sheet.name}: unreadable raw: {e}")
+            continue
+        checks[sheet.id] = pool.submit(validate_raw_sheet, str(raw_of[sheet.id]), grid_cols=settings["grid_cols"],
+                                       grid_rows=settings["grid_rows"], threshold=settings["threshold"],
+                                       tolerance=settings["tolerance"], **validate_settings(manifest))
+    jobs = {}
+    for sheet in sheets:
+        if sheet.id not in checks:
+            continue
+        # One bad raw (unreadable, deleted mid-check, worker crash) must not stop the watcher
+        try:
+            problems = checks[sheet.id].result()
+            if not problems:
+                jobs[sheet.id] = pool.submit(timed_call, time.time(), process_sprite_sheet, str(raw_of[sheet.id]),
+                                             str(sheet.output), run_timeout=PROCESS_TIMEOUT,
+                                             max_bytes=manifest["process"].get("max_bytes"), **settings)
+        except Exception as e:
+            print(f"  ✗ {sheet.name}: validation error: {e!r}")
+            continue
+        if problems:
+            print(f"  ✗ {sheet.name}: invalid raw: {'; '.join(problems)}")
+
+    rebuilt = []
+    for sheet_id, job in jobs.items():
+        sheet = nodes[sheet_id]
+        try:
+            _, _, ok = job.result()
+        except Exception as e:
+            print(f"  ✗ {sheet.name}: processing error: {e!r}")
+            continue
+        if not ok:
+            print(f"  ✗ {sheet.name}: processing failed")
+            continue
+        cache.record(sheet.output, keys[sheet_id], raw_of[sheet_id])
+        rebuilt.append(sheet)
+    cache.save()
+    return rebuilt
+
+def refresh_atlas(atlas: Node, changed: list[Path], manifest: dict, cache: ProcessCache):
+    """Repaint just the changed strips when the layout still fits, else repack."""
+    from pack_atlas import update_atlas
+
+    if not update_atlas(changed, atlas.output.parent):
+        pack_atlas_node(atlas, manifest)
+    cache.record(atlas.output, atlas_key(atlas, cache, manifest["atlas"]))
+    cache.save()
+
+def watch(nodes: dict[str, Node], selected: set[str], manifest: dict, cache: ProcessCache,
+          pool: ProcessPoolExecutor, poll: float = 0.5, debounce: float = 0.3):
+    """Poll raws of the selected sheets and rebuild sheets (and the atlas) as they change.
+
+    A raw is picked up once its size and mtime have been stable for
+    `debounce` seconds, so a file still being written, or a burst of saves,
+    triggers one rebuild. Raws already out of date when watching starts are
+    rebuilt on the first pass.
+    """
+    settings = process_settings(manifest)
+    sheets = {nodes[node.deps[0]].output: node for node in nodes.values()
+              if node.kind == "sheet" and node.id in selected}
+    atlas = nodes.get("atlas") if "atlas" in selected else None
+
+    atlas_dirty = set()
+    seen = {raw: stat_stamp(raw) for raw in sheets}
+    pending = {raw: 0.0 for raw, sheet in sheets.items()
+               if seen[raw] and not cache.is_fresh(sheet.output, cache.key_for(raw, settings))}
+    print(f"Watching {len(sheets)} raws every {poll:g}s ({len(pending)} out of date); Ctrl-C to stop")
+    try:
+        while True:
+            now = time.monotonic()
+            for raw in sheets:
+                stamp = stat_stamp(raw)
+                if stamp != seen[raw]:
+                    seen[raw] = stamp
+                    if stamp is not None:
+                        pending[raw] = now
+            ready = [raw for raw, changed_at in pending.items() if now - changed_at >= debounce]
+            if ready:
+                for raw in ready:
+                    del pending[raw]
+                start = time.monotonic()
+                rebuilt = rebuild_sheets([sheets[raw] for raw in ready], nodes, manifest, cache, pool)
+                atlas_dirty.update(sheet.output for sheet in rebuilt if atlas and sheet.output in atlas.inputs)
+                # Strips changed while another input was missing are repainted once it appears
+                if atlas_dirty and all(path.exists() for path in atlas.inputs):
+                    refresh_atlas(atlas, sorted(atlas_dirty), manifest, cache)
+                    atlas_dirty.clear()
+                print(f"  ✓ Rebuilt {len(rebuilt)}/{len(ready)} sheets in {time.monotonic() - start:.2f}s: "
+                      f"{', '.join(sheet.name for sheet in rebuilt) or '-'}")
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Incrementally build sprite raws, sheets and atlases from sprites.json.")
+    parser.add_argument("targets", nargs="*", help="roster names or node ids (raw:NAME, sheet:NAME, atlas)")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH, help="build manifest (default: sprites.json)")
+    parser.add_argument("--dry-run", action="store_true", help="print stale nodes and why, then exit")
+    parser.add_argument("--concurrency", type=int, default=4, help="generations in flight at once (default: 4)")
+    parser.add_argument("--rpm", type=float, default=10, help="provider request limit per minute (default: 10)")
+    parser.add_argument("--burst", type=int, default=2, help="requests allowed back to back (default: 2)")
+    parser.add_argument("--process-workers", "-j", type=int, default=2,
+                        help="warm processing workers (default: 2)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="generated raws allowed to wait for processing before generation pauses (default: 8)")
+    parser.add_argument("--isolate", action="store_true",
+                        help="process each sheet in its own `uv run` subprocess instead of warm workers")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="attempts per raw for timeouts and rate limits (default: 3)")
+    parser.add_argument("--backoff", type=float, default=5.0,
+                        help="first retry delay in seconds, doubled each attempt (default: 5)")
+    parser.add_argument("--resume", action="store_true",
+                        help="trust what an interrupted run with the same manifest journaled as generated or processed")
+    parser.add_argument("--no-generation-cache", action="store_true",
+                        help="always call the generator, even for a prompt/reference pair seen before")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild sheets and the atlas whenever a raw changes")
+    parser.add_argument("--poll", type=float, default=0.5, help="--watch polling interval in seconds (default: 0.5)")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="--watch waits until a raw is unchanged this long (default: 0.3)")
+    parser.add_argument("--metrics-textfile", type=Path,
+                        help="Prometheus textfile to write (default: metrics.textfile in sprites.json)")
+    parser.add_argument("--stub", action="store_true", help="use the offline stub generator instead of the API")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    base_dir = args.manifest.resolve().parent
+    nodes = build_graph(manifest, base_dir)
+    selected = select_nodes(nodes, args.targets)
+    cache = ProcessCache(base_dir / manifest["cache"])
+    journal_path = base_dir / manifest["journal"]
+    fingerprint = run_fingerprint(manifest)
+    resumed = JobJournal.replay(journal_path, fingerprint) if args.resume else {}
+    generation = manifest["generation"]
+    generations = None if args.no_generation_cache else GenerationCache(
+        base_dir / generation["cache_dir"], generation["cache_max_bytes"])
+
+    if args.watch:
+        with ProcessPoolExecutor(max_workers=args.process_workers, initializer=warm_worker) as pool:
+            watch(nodes, selected, manifest, cache, pool, args.poll, args.debounce)
+        return 0
+
+    stale = plan(nodes, selected, manifest, cache, resumed, generations)
+    print(f"{len(selected)} nodes selected, {len(stale)} stale")
+    for node_id in topo_order(nodes, selected):
+        if node_id in stale:
+            print(f"  {node_id}: {stale[node_id]}")
+    if args.dry_run:
+        return 0
+    if not stale:
+        # Keep the digests just refreshed, so the next check skips rehashing
+        cache.save()
+        return 0
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not args.stub and not api_key and any(nodes[node_id].kind == "raw" for node_id in stale):
+        print("✗ GEMINI_API_KEY is not set; export it to generate raws, or pass --stub", file=sys.stderr)
+        return 1
+
+    metrics = PipelineMetrics()
+    pool = None if args.isolate else ProcessPoolExecutor(max_workers=args.process_workers, initializer=warm_worker)
+    journal = JobJournal(journal_path)
+    journal.start_run(fingerprint, resume=args.resume)
+    try:
+        bucket = TokenBucket(rate=args.rpm / 60, capacity=args.burst)
+        generate = stub_generator() if args.stub else cli_generator(
+            SKILL_SCRIPT, api_key, manifest["generation"]["resolution"], bucket=bucket)
+        retry = RetryPolicy(max_attempts=args.retries, base_delay=args.backoff)
+        results = asyncio.run(execute(nodes, selected, stale, manifest, cache, generate, bucket,
+                                      args.concurrency, retry, journal, pool, generations, metrics,
+                                      args.queue_size))
+        journal.finish_run()
+    finally:
+        journal.close()
+        if pool is not None:
+            pool.shutdown()
+
+    textfile = args.metrics_textfile or base_dir / manifest["metrics"]["textfile"]
+    summary_path = base_dir / manifest["metrics"]["summary"]
+    metrics.write(textfile, summary_path, {"nodes": results})
+    print()
+    metrics.print_summary()
+    print(f"Nodes: {len(results['built'])} built, {len(results['failed'])} failed, "
+          f"{len(results['skipped'])} up to date")
+    for node_id in sorted(results["failed"]):
+        print(f"  ✗ {node_id}")
+    print(f"Metrics written to {textfile} and {summary_path}")
+    return 1 if results["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
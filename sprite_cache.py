@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache manifest for the sprite processing pipeline.
+
+A processed sheet is up to date when the hash of its raw input plus the
+processing settings it was built with match what the manifest recorded.
+Changing a keying threshold or the frame size therefore invalidates exactly
+the sheets built with the old value, instead of relying on output existence.
+
+GenerationCache does the same one stage earlier: generated raw sheets are
+stored by the hash of what was asked for, so an identical request never
+costs a second API call.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+# Bump when process_sprite.py changes its output for the same settings
+PIPELINE_VERSION = 1
+# How ProcessCache entries are keyed; manifests keyed any other way are not trusted
+ENTRY_KEYS = "relative-path"
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(raw_digest: str, settings: dict) -> str:
+    """Combine a raw image hash with processing settings into one cache key."""
+    payload = json.dumps({"raw": raw_digest, "settings": settings, "version": PIPELINE_VERSION},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ProcessCache:
+    """JSON manifest mapping each processed output to the key it was built from."""
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = Path(manifest_path)
+        self.entries = {}
+        self.digests = {}
+        if self.manifest_path.exists():
+            data = json.loads(self.manifest_path.read_text())
+            if data.get("entry_keys") == ENTRY_KEYS:
+                self.entries = data.get("entries", {})
+            self.digests = data.get("digests", {})
+
+    def raw_digest(self, raw_path: Path) -> str:
+        """Hash a raw sheet, reusing the stored digest while size and mtime are unchanged."""
+        st = os.stat(raw_path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self.digests.get(str(raw_path))
+        if known and known["stat"] == stamp:
+            return known["sha256"]
+        digest = file_digest(raw_path)
+        self.digests[str(raw_path)] = {"stat": stamp, "sha256": digest}
+        return digest
+
+    def key_for(self, raw_path: Path, settings: dict) -> str:
+        return cache_key(self.raw_digest(raw_path), settings)
+
+    def entry_name(self, output_path: Path) -> str:
+        """Output path relative to the manifest, so same-named outputs in other dirs don't collide."""
+        return Path(os.path.relpath(Path(output_path).resolve(), self.manifest_path.resolve().parent)).as_posix()
+
+    def is_fresh(self, output_path: Path, key: str) -> bool:
+        """True when output exists and was built from exactly this key."""
+        entry = self.entries.get(self.entry_name(output_path))
+        return entry is not None and entry["key"] == key and Path(output_path).exists()
+
+    def record(self, output_path: Path, key: str, raw_path: Path | None = None):
+        self.entries[self.entry_name(output_path)] = {"key": key, "raw": str(raw_path) if raw_path else None}
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run can't corrupt it."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"version": PIPELINE_VERSION, "entry_keys": ENTRY_KEYS,
+                                        "entries": self.entries, "digests": self.digests},
+                                       indent=2, sort_keys=True))
+        os.replace(tmp_path, self.manifest_path)
+
+def generation_key(prompt: str, reference_digest: str, resolution: str, model: str) -> str:
+    """Everything that determines a generated raw sheet, hashed into one key."""
+    payload = json.dumps({"prompt": prompt, "reference": reference_digest,
+                          "resolution": resolution, "model": model}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class GenerationCache:
+    """Content-addressed store of generated raw sheets with size-based LRU eviction.
+
+    A paid generation is only needed the first time a (prompt, reference,
+    resolution, model) combination is requested; renamed outputs or a wiped
+    raw/ directory are then restored from here.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self.entries = {}
+        if self.index_path.exists():
+            self.entries = json.loads(self.index_path.read_text()).get("entries", {})
+
+    def blob_path(self, key: str) -> Path:
+        return self.root / f"{key}.png"
+
+    def get(self, key: str, dest: Path) -> bool:
+        """Copy the cached raw for key to dest; False on a miss."""
+        entry = self.entries.get(key)
+        blob = self.blob_path(key)
+        if entry is None or not blob.exists():
+            self.entries.pop(key, None)
+            return False
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(dest).with_suffix(".tmp")
+        shutil.copyfile(blob, tmp_path)
+        os.replace(tmp_path, dest)
+        entry["last_used"] = time.time()
+        return True
+
+    def put(self, key: str, src: Path):
+        """Store a freshly generated raw, then evict least recently used blobs over budget."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        blob = self.blob_path(key)
+        tmp_path = blob.with_suffix(".tmp")
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, blob)
+        self.entries[key] = {"size": blob.stat().st_size, "last_used": time.time(), "source": Path(src).name}
+        self.evict()
+
+    def discard(self, key: str):
+        """Forget a cached raw (e.g. one that failed validation)."""
+        self.entries.pop(key, None)
+        self.blob_path(key).unlink(missing_ok=True)
+
+    def evict(self) -> list[str]:
+        total = sum(entry["size"] for entry in self.entries.values())
+        evicted = []
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries.pop(key)["size"]
+            self.blob_path(key).unlink(missing_ok=True)
+            evicted.append(key)
+        return evicted
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"entries": self.entries}, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Header-only sprite geometry checks.
+
+game.js skips measuring sprites it already knows: preseedSpriteCache
+hardcodes 640x96 for 8-frame sheets and 80x96 for single frames. A file on
+disk with any other size is drawn with the wrong frame width. These helpers
+verify that without decoding images:
+- index_sprites lists each sprite directory once with os.scandir and reads
+  only the first 24 bytes of every PNG (signature + IHDR width/height)
+- preseeded_geometry recovers what preseedSpriteCache assumes, path by path
+- geometry_mismatches compares the two
+"""
+
+import os
+import re
+import struct
+from pathlib import Path
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def png_size(path: str | Path) -> tuple[int, int] | None:
+    """(width, height) from a PNG's IHDR chunk, or None if it isn't a PNG."""
+    with open(path, "rb") as f:
+        head = f.read(24)
+    if len(head) < 24 or head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+def index_sprites(dirs: list[str | Path]) -> dict[str, tuple[int, int] | None]:
+    """Every .png directly inside dirs -> its header size, keyed by the path game.js would use."""
+    index = {}
+    for directory in dict.fromkeys(str(d) for d in dirs):
+        try:
+            entries = os.scandir(directory or ".")
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".png") and entry.is_file():
+                    key = entry.name if directory in ("", ".") else f"{directory.rstrip('/')}/{entry.name}"
+                    index[key] = png_size(entry.path)
+    return index
+
+# const sheetEntry = { isSheet: true, frames: 8, width: 640, height: 96 };
+ENTRY_RE = re.compile(r"\b(?:const|let|var)\s+(\w+)\s*=\s*\{[^}]*?\bwidth:\s*(\d+),\s*height:\s*(\d+)[^}]*\}")
+# _spriteSheetCache['player-idle-v2.png' + V] = singleEntry;
+LITERAL_RE = re.compile(r"_spriteSheetCache\[\s*'([^']+)'\s*\+\s*V\s*\]\s*=\s*(\w+)")
+# _spriteSheetCache[base + 'back-run.png' + V] = sheetEntry;
+BASED_RE = re.compile(r"_spriteSheetCache\[\s*base\s*\+\s*'([^']+)'\s*\+\s*V\s*\]\s*=\s*(\w+)")
+IDS_RE = re.compile(r"\bids\s*=\s*\[([^\]]*)\]")
+BASE_RE = re.compile(r"\bbase\s*=\s*'([^']*)'\s*\+\s*id\s*\+\s*'([^']*)'")
+
+def preseeded_geometry(content: str) -> dict[str, list[int]]:
+    """Sprite path -> [width, height] that preseedSpriteCache assumes, if this file has it."""
+    start = content.find("function preseedSpriteCache")
+    if start == -1:
+        return {}
+    end = content.find("})();", start)
+    body = content[start:end if end != -1 else len(content)]
+    entries = {name: [int(w), int(h)] for name, w, h in ENTRY_RE.findall(body)}
+
+    geometry = {path: entries[entry] for path, entry in LITERAL_RE.findall(body) if entry in entries}
+    ids, base = IDS_RE.search(body), BASE_RE.search(body)
+    if ids and base:
+        for char_id in re.findall(r"'([^']+)'", ids.group(1)):
+            for suffix, entry in BASED_RE.findall(body):
+                if entry in entries:
+                    geometry[f"{base.group(1)}{char_id}{base.group(2)}{suffix}"] = entries[entry]
+    return geometry
+
+def geometry_mismatches(expected: dict[str, list[int]],
+                        index: dict[str, tuple[int, int] | None]) -> list[str]:
+    """Preseeded sprites present on disk whose header size differs from the assumption."""
+    problems = []
+    for path, (width, height) in expected.items():
+        if path not in index:
+            continue
+        size = index[path]
+        if size is None:
+            problems.append(f"{path}: not a valid PNG (expected {width}x{height})")
+        elif tuple(size) != (width, height):
+            problems.append(f"{path}: {size[0]}x{size[1]}, game.js assumes {width}x{height}")
+    return problems
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL journal of sprite job state transitions.
+
+Every transition (queued → generating → generated → processed, or failed)
+is written as one JSON line and fsync'd before the pipeline moves on, so a
+crash mid-roster loses at most the transition in flight. Each build run is
+bracketed by start/finish markers, the start carrying a fingerprint of the
+settings the run used. replay() folds the last unfinished run back into the
+last known state per job for --resume; a finished run, or one made with
+other settings, has nothing to resume.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+STATES = ("queued", "generating", "generated", "processed", "failed")
+
+def drop_torn_tail(path: Path, chunk_size: int = 4096):
+    """Truncate a half-written last line left by a crash, so new records start on a fresh line."""
+    if not path.exists():
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+            os.fsync(f.fileno())
+
+class JobJournal:
+    """Durable job log; with path=None every call is a no-op."""
+
+    def __init__(self, path: Path | None):
+        self.path = Path(path) if path else None
+        self._file = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            drop_torn_tail(self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, entry: dict):
+        if self._file is None:
+            return
+        self._file.write(json.dumps({"ts": time.time(), **entry}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, name: str, state: str, **fields):
+        if state not in STATES:
+            raise ValueError(f"Unknown job state: {state}")
+        self._write({"job": name, "state": state, **fields})
+
+    def start_run(self, fingerprint: str, resume: bool = False):
+        """Mark a run start; with resume, the unfinished run before it carries on."""
+        self._write({"run": "start", "fingerprint": fingerprint, "resume": resume})
+
+    def finish_run(self):
+        """Mark the run complete, so a later --resume has nothing to trust."""
+        self._write({"run": "finish"})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def replay(path: Path, fingerprint: str | None = None) -> dict[str, dict]:
+        """Last entry per job in the unfinished run to resume; {} if the last run finished.
+
+        A run started with resume=True extends the unfinished run before it
+        when both share a fingerprint. Given a fingerprint, a run made with
+        another one (or from before runs were marked) is not trusted. A torn
+        final line from a crash is ignored.
+        """
+        last, finished, run_fingerprint = {}, False, None
+        if not Path(path).exists():
+            return last
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                run = entry.get("run")
+                if run == "start":
+                    if not (entry.get("resume") and not finished and entry.get("fingerprint") == run_fingerprint):
+                        last = {}
+                    finished, run_fingerprint = False, entry.get("fingerprint")
+                elif run == "finish":
+                    finished = True
+                else:
+                    last[entry["job"]] = entry
+        if finished or (fingerprint is not None and run_fingerprint != fingerprint):
+            return {}
+        return last
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency histograms and outcome counters for the sprite pipeline.
+
+Stages record how long each job waited for a slot (generate_wait for a
+rate-limit token, backlog_wait for room among raws awaiting processing,
+process_wait for a free worker) and how long the work
+itself took (generate, validate, process, atlas), and count outcomes per
+stage. At the end of a run the numbers are written twice: as a Prometheus
+textfile for node_exporter's textfile collector on shared build machines,
+and as a JSON summary with p50/p95 per stage for humans and CI.
+"""
+
+import json
+import math
+import os
+import signal
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+# Seconds; spans a cached restore (~ms) up to a slow generation (minutes)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class Histogram:
+    """Latency samples with Prometheus-style cumulative buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.samples = []
+
+    def observe(self, value: float):
+        self.samples.append(value)
+
+    def bucket_counts(self) -> list[int]:
+        return [sum(1 for v in self.samples if v <= bound) for bound in self.buckets]
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile of the recorded samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class PipelineMetrics:
+    """Thread-safe histograms and counters keyed by stage; disabled instances record nothing."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms = defaultdict(Histogram)
+        self.counters = Counter()
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        if self.enabled:
+            with self._lock:
+                self.histograms[stage].observe(seconds)
+
+    def count(self, stage: str, outcome: str, n: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[(stage, outcome)] += n
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> dict:
+        stages = {}
+        for stage, hist in sorted(self.histograms.items()):
+            stages[stage] = {
+                "count": len(hist.samples),
+                "sum_s": sum(hist.samples),
+                "p50_s": hist.quantile(0.5),
+                "p95_s": hist.quantile(0.95),
+                "max_s": max(hist.samples, default=0.0),
+            }
+        counters = defaultdict(dict)
+        for (stage, outcome), value in sorted(self.counters.items()):
+            counters[stage][outcome] = value
+        return {"wall_s": self.elapsed(), "stages": stages, "counters": dict(counters)}
+
+    def prometheus(self, prefix: str = "sprite_pipeline") -> str:
+        """Render everything in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Time spent per job in each pipeline stage.",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        for stage, hist in sorted(self.histograms.items()):
+            for bound, count in zip(hist.buckets, hist.bucket_counts()):
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {count}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {len(hist.samples)}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {sum(hist.samples):.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {len(hist.samples)}')
+        lines += [
+            f"# HELP {prefix}_jobs_total Jobs finished per stage and outcome.",
+            f"# TYPE {prefix}_jobs_total counter",
+        ]
+        for (stage, outcome), value in sorted(self.counters.items()):
+            lines.append(f'{prefix}_jobs_total{{stage="{stage}",outcome="{outcome}"}} {value}')
+        lines += [
+            f"# HELP {prefix}_run_duration_seconds Wall time of the last run.",
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {self.elapsed():.3f}",
+            f"# HELP {prefix}_last_run_timestamp_seconds When the last run finished.",
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, textfile: Path, summary_path: Path, extra: dict | None = None) -> dict:
+        """Atomically write the Prometheus textfile and the JSON summary; return the summary."""
+        summary = {**self.summary(), **(extra or {})}
+        for path, text in ((Path(textfile), self.prometheus()),
+                           (Path(summary_path), json.dumps(summary, indent=2, sort_keys=True))):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # node_exporter must never scrape a half-written file
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_text(text)
+            os.replace(tmp_path, path)
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"{'stage':<14} {'count':>6} {'p50':>9} {'p95':>9} {'total':>9}  outcomes")
+        for stage, stats in summary["stages"].items():
+            outcomes = ", ".join(f"{k} {v}" for k, v in summary["counters"].get(stage, {}).items())
+            print(f"{stage:<14} {stats['count']:>6} {stats['p50_s']:>8.2f}s {stats['p95_s']:>8.2f}s "
+                  f"{stats['sum_s']:>8.1f}s  {outcomes}")
+        print(f"Wall time: {summary['wall_s']:.1f}s")
+
+NO_METRICS = PipelineMetrics(enabled=False)
+
+@contextmanager
+def run_time_limit(seconds: float | None):
+    """Raise TimeoutError in the block after `seconds`, where SIGALRM is available."""
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise TimeoutError(f"still running after {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def timed_call(submitted_at: float, fn, *args, run_timeout: float | None = None, **kwargs):
+    """Run fn in a pool worker, returning (queue wait, run time, result).
+
+    submitted_at is time.time() at submission, so the wait covers time spent
+    queued for a free worker. run_timeout bounds the run time alone, so a
+    long queue can't time out a job that hasn't started yet.
+    """
+    started = time.time()
+    with run_time_limit(run_timeout):
+        result = fn(*args, **kwargs)
+    return started - submitted_at, time.time() - started, result
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Asyncio scheduler for sprite sheet generation.
+
+Runs up to N generations at once under a token-bucket rate limit, instead of
+one blocking subprocess at a time with a fixed sleep between calls. When the
+provider answers with a rate-limit error, the bucket is drained for a while
+so every in-flight worker backs off together.
+
+sprite_build.execute drives generate_with_retry per raw, so each sheet is
+processed as soon as its own raw is done while later raws are still being
+generated; a bounded backlog of unprocessed raws pauses generation when
+processing falls behind.
+
+Timeouts and rate-limit errors are retried with exponential backoff, and
+every state transition can be written to a JobJournal. Queue wait and
+generation latency go to an optional PipelineMetrics.
+
+A stub generator that writes synthetic raw sheets lets the whole scheduler
+run offline.
+"""
+
+import asyncio
+import os
+import random
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from sprite_journal import JobJournal
+from sprite_metrics import NO_METRICS, PipelineMetrics
+
+# stderr fragments the image provider uses for quota / rate-limit errors
+RATE_LIMIT_MARKERS = ("429", "RESOURCE_EXHAUSTED", "rate limit", "quota")
+
+class RetryableError(Exception):
+    """A generation failure worth retrying after a backoff (timeout, rate limit)."""
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 5.0
+    max_delay: float = 120.0
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter after the given (1-based) failed attempt."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (0.5 + random.random() / 2)
+
+NO_JOURNAL = JobJournal(None)
+
+@dataclass
+class GenerationJob:
+    name: str
+    prompt: str
+    output_path: Path
+    reference: Path
+    final_path: Path | None = None
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, seconds: float):
+        """Stop handing out tokens for `seconds` (provider said slow down)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+def is_rate_limited(stderr: str) -> bool:
+    lowered = stderr.lower()
+    return any(marker.lower() in lowered for marker in RATE_LIMIT_MARKERS)
+
+def cli_generator(script: str, api_key: str, resolution: str = "2K", timeout: float = 120,
+                  bucket: TokenBucket | None = None, rate_limit_pause: float = 60):
+    """Generator that runs the nano-banana-pro script as an async subprocess."""
+
+    async def generate(job: GenerationJob) -> bool:
+        cmd = [
+            "uv", "run", script,
+            "--prompt", job.prompt,
+            "--filename", str(job.output_path),
+            "--input-image", str(job.reference),
+            "--resolution", resolution,
+        ]
+        env = os.environ.copy()
+        env["GEMINI_API_KEY"] = api_key
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise RetryableError(f"timeout after {timeout:.0f}s")
+
+        if proc.returncode == 0 and job.output_path.exists():
+            return True
+        message = stderr.decode(errors="replace").strip()
+        if is_rate_limited(message):
+            if bucket is not None:
+                print(f"    ✗ {job.name}: rate limited, pausing new requests for {rate_limit_pause:.0f}s")
+                bucket.penalize(rate_limit_pause)
+            raise RetryableError("rate limited")
+        print(f"    ✗ {job.name}: {message[:200]}")
+        return False
+
+    return generate
+
+def stub_generator(latency: float = 0.5, failure_rate: float = 0.0, seed: int = 0):
+    """Offline generator: waits `latency` seconds and writes a synthetic 2K raw sheet."""
+    rng = random.Random(seed)
+
+    async def generate(job: GenerationJob) -> bool:
+        from bench_sprites import synthesize_raw_sheet
+
+        await asyncio.sleep(latency * (0.5 + rng.random()))
+        if rng.random() < failure_rate:
+            print(f"    ✗ {job.name}: stub failure")
+            return False
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        sheet = await asyncio.to_thread(synthesize_raw_sheet, 2816, 1536, zlib.crc32(job.name.encode()))
+        await asyncio.to_thread(sheet.save, job.output_path)
+        return True
+
+    return generate
+
+async def generate_with_retry(job: GenerationJob, generate, semaphore: asyncio.Semaphore,
+                              bucket: TokenBucket | None, retry: RetryPolicy,
+                              journal: JobJournal = NO_JOURNAL, metrics: PipelineMetrics = NO_METRICS) -> bool:
+    for attempt in range(1, retry.max_attempts + 1):
+        retryable = False
+        error = None
+        queued = time.monotonic()
+        async with semaphore:
+            if bucket is not None:
+                await bucket.acquire()
+            metrics.observe("generate_wait", time.monotonic() - queued)
+            print(f"  Generating: {job.output_path.name}" + (f" (attempt {attempt})" if attempt > 1 else ""))
+            journal.record(job.name, "generating", attempt=attempt)
+            start = time.monotonic()
+            try:
+                ok = await generate(job)
+            except RetryableError as e:
+                ok, retryable, error = False, True, str(e)
+            except Exception as e:
+                ok, error = False, f"exception: {e}"
+            duration = time.monotonic() - start
+            metrics.observe("generate", duration)
+
+        if ok:
+            metrics.count("generate", "success")
+            print(f"    ✓ {job.name}: generated")
+            journal.record(job.name, "generated", attempt=attempt, duration_s=duration)
+            return True
+        # Back off outside the semaphore so other jobs keep the slots busy
+        if retryable and attempt < retry.max_attempts:
+            delay = retry.delay(attempt)
+            metrics.count("generate", "retry")
+            print(f"    ✗ {job.name}: {error}, retrying in {delay:.0f}s")
+            journal.record(job.name, "failed", attempt=attempt, duration_s=duration,
+                           error=error, retry_in_s=delay)
+            await asyncio.sleep(delay)
+            continue
+        metrics.count("generate", "failure")
+        print(f"    ✗ {job.name}: {error or 'generation failed'}")
+        journal.record(job.name, "failed", attempt=attempt, duration_s=duration,
+                       error=error or "generation failed", stage="generate")
+        return False
+    return False
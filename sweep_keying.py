@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pillow>=10.0.0",
+#     "numpy>=1.24.0",
+# ]
+# ///
+"""
+Sweep charcoal keying parameters across every raw sheet at once.
+- Decodes each raw once and reduces it to a 256x256 histogram over
+  (brightest channel, channel spread), the two values the keying rule looks at
+- A 2D cumulative sum of that histogram gives the keyed pixel count for
+  every (threshold, tolerance) pair simultaneously
+- Reports background coverage, foreground pixels lost (keyed pixels that
+  are not close to #2d2d2d, e.g. shadows and dark outfits) and charcoal
+  left behind as halo, per pair and per sheet
+
+Usage:
+    sweep_keying.py sprites-v2/raw
+    sweep_keying.py 'sprites-v2/raw/*-raw.png' --thresholds 60:101:5 --tolerances 10:51:5
+    sweep_keying.py sprites-v2/raw --detail 70,25 --json sweep.json
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+import numpy as np
+
+from process_sprite import find_raw_sheets
+
+CHARCOAL = 0x2d
+DEFAULT_PAIR = (80, 30)
+
+def parse_range(value: str) -> list[int]:
+    """'60:101:5' -> [60, 65, ..., 100]; '80' -> [80]."""
+    parts = [int(p) for p in value.split(":")]
+    return list(range(*parts)) if len(parts) > 1 else parts
+
+def keying_histograms(path: Path, stride: int = 1, margin: int = 12) -> tuple[np.ndarray, np.ndarray]:
+    """Histograms over (max channel, channel spread) of all pixels, and of non-charcoal pixels."""
+    img = Image.open(path)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    rgb = np.asarray(img)[::stride, ::stride, :3]
+    max_rgb = rgb.max(axis=-1)
+    min_rgb = rgb.min(axis=-1)
+    bins = max_rgb.astype(np.int32) * 256 + (max_rgb - min_rgb)
+    # Ground truth for "background": within margin of #2d2d2d on every channel
+    charcoal = (max_rgb <= CHARCOAL + margin) & (min_rgb >= CHARCOAL - margin)
+    total = np.bincount(bins.ravel(), minlength=256 * 256).reshape(256, 256)
+    foreground = np.bincount(bins[~charcoal], minlength=256 * 256).reshape(256, 256)
+    return total, foreground
+
+def keyed_counts(hist: np.ndarray, thresholds: list[int], tolerances: list[int]) -> np.ndarray:
+    """Pixels with max < threshold and spread < tolerance, for every pair (len(T) x len(L))."""
+    # Leading zero row/column so prefix[t, l] counts bins strictly below (t, l)
+    prefix = np.zeros((257, 257), dtype=np.int64)
+    prefix[1:, 1:] = hist.cumsum(axis=0).cumsum(axis=1)
+    return prefix[np.ix_(np.clip(thresholds, 0, 256), np.clip(tolerances, 0, 256))]
+
+def sweep(paths: list[Path], thresholds: list[int], tolerances: list[int],
+          stride: int = 1, margin: int = 12, jobs: int | None = None) -> dict:
+    """Per-sheet keyed / foreground-lost counts for every (threshold, tolerance) pair."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        hists = list(pool.map(lambda p: keying_histograms(p, stride, margin), paths))
+
+    sheets = {}
+    for path, (total, foreground) in zip(paths, hists):
+        pixels = int(total.sum())
+        charcoal = pixels - int(foreground.sum())
+        keyed = keyed_counts(total, thresholds, tolerances)
+        lost = keyed_counts(foreground, thresholds, tolerances)
+        sheets[path.name] = {
+            "pixels": pixels,
+            "coverage": keyed / pixels,
+            "foreground_lost": lost,
+            # Charcoal that survives keying shows up as a halo around the sprite
+            "charcoal_left": charcoal - (keyed - lost),
+        }
+    return sheets
+
+def summarize(sheets: dict, thresholds: list[int], tolerances: list[int]) -> list[dict]:
+    rows = []
+    for i, t in enumerate(thresholds):
+        for j, l in enumerate(tolerances):
+            rows.append({
+                "threshold": t,
+                "tolerance": l,
+                "mean_coverage": float(np.mean([s["coverage"][i, j] for s in sheets.values()])),
+                "foreground_lost": int(sum(s["foreground_lost"][i, j] for s in sheets.values())),
+                "charcoal_left": int(sum(s["charcoal_left"][i, j] for s in sheets.values())),
+            })
+    return rows
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate charcoal keying thresholds over all raw sheets at once.")
+    parser.add_argument("source", help="directory or glob of raw sheets")
+    parser.add_argument("--thresholds", type=parse_range, default=parse_range("50:111:10"),
+                        metavar="START:STOP:STEP", help="threshold values to try (default: 50:111:10)")
+    parser.add_argument("--tolerances", type=parse_range, default=parse_range("10:51:10"),
+                        metavar="START:STOP:STEP", help="tolerance values to try (default: 10:51:10)")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="sample every Nth pixel in each direction (default: 1, all pixels)")
+    parser.add_argument("--margin", type=int, default=12,
+                        help="how far from #2d2d2d a pixel may be and still count as background (default: 12)")
+    parser.add_argument("--detail", type=lambda v: tuple(int(x) for x in v.split(",")), default=DEFAULT_PAIR,
+                        metavar="T,L", help="pair to break down per sheet (default: 80,30, the current keying)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="decode threads (default: CPU count)")
+    parser.add_argument("--json", type=Path, help="also write the full sweep as JSON")
+    args = parser.parse_args(argv)
+
+    paths = find_raw_sheets(args.source)
+    if not paths:
+        print(f"No raw sheets found for {args.source}", file=sys.stderr)
+        return 1
+    thresholds = sorted(set(args.thresholds) | {args.detail[0]})
+    tolerances = sorted(set(args.tolerances) | {args.detail[1]})
+
+    print(f"Sweeping {len(thresholds)}x{len(tolerances)} keying pairs over {len(paths)} sheets")
+    sheets = sweep(paths, thresholds, tolerances, args.stride, args.margin, args.jobs)
+    rows = summarize(sheets, thresholds, tolerances)
+
+    print(f"\n{'threshold':>9} {'tolerance':>9} {'coverage':>9} {'fg lost':>12} {'halo left':>12}")
+    for row in rows:
+        marker = "  <- current" if (row["threshold"], row["tolerance"]) == DEFAULT_PAIR else ""
+        print(f"{row['threshold']:>9} {row['tolerance']:>9} {row['mean_coverage'] * 100:>8.2f}% "
+              f"{row['foreground_lost']:>12,} {row['charcoal_left']:>12,}{marker}")
+
+    i, j = thresholds.index(args.detail[0]), tolerances.index(args.detail[1])
+    print(f"\nPer sheet at threshold {args.detail[0]}, tolerance {args.detail[1]}:")
+    for name, stats in sorted(sheets.items()):
+        print(f"  {name:<40} coverage {stats['coverage'][i, j] * 100:6.2f}%  "
+              f"fg lost {int(stats['foreground_lost'][i, j]):>9,}  halo {int(stats['charcoal_left'][i, j]):>9,}")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "thresholds": thresholds,
+            "tolerances": tolerances,
+            "pairs": rows,
+            "sheets": {name: {"pixels": s["pixels"], "coverage": s["coverage"].tolist(),
+                              "foreground_lost": s["foreground_lost"].tolist(),
+                              "charcoal_left": s["charcoal_left"].tolist()}
+                       for name, s in sheets.items()},
+        }, indent=2))
+        print(f"\nFull sweep written to {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
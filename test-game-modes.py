@@ -1,212 +1,294 @@
 #!/usr/bin/env python3
+"""
+Test Championship Tennis game modes and features.
+
+Each source is reduced to the facts this report needs (characters, game
+modes, scoring functions, feature markers, error-handling counts, the
+sprite sizes preseedSpriteCache assumes) in a
+process pool (or read back from .source-cache.json when the file is
+unchanged); the facts are merged and scored as one report. Defaults to
+every .html/.js here.
+
+Usage:
+    test-game-modes.py
+    test-game-modes.py index.html game.js
+"""
+
+import argparse
+import os
 import re
-import json
+import sys
+from pathlib import Path
 
-# Read the HTML file
-with open('index.html', 'r') as f:
-    content = f.read()
+import sprite_geometry
+from source_cache import DEFAULT_CACHE, SourceCache
+from source_scan import analyze_files, find_sources
+from sprite_geometry import geometry_mismatches, index_sprites, preseeded_geometry
 
-print("🧪 Testing Championship Tennis game modes and features...")
+SCORING_FUNCTIONS = ['updateScore', 'checkGameWin', 'checkSetWin', 'checkMatchWin', 'getTiebreakServer']
+AUDIO_FUNCTIONS = ['playTone', 'AudioManager', 'safePlaySound']
+MOBILE_FEATURES = ['touch', 'viewport', 'MobileEnhancer', 'mobileVibrate', 'user-scalable=no']
+HARDENING_FEATURES = ['safeGetElement', 'ErrorRecovery', 'LoadingManager', 'PerformanceOptimizer', 'validateCriticalState']
+ERROR_PATTERNS = ['try {', 'catch', 'console.error', 'console.warn']
 
-# 1. Test character availability
-print("\n👥 CHARACTERS:")
-characters = re.findall(r"id:'([^']*)'[^}]*name:'([^']*)'", content)
-for char_id, char_name in characters:
-    print(f"  ✅ {char_id}: {char_name}")
+def mode_facts(content: str) -> dict:
+    """Everything the report looks at in one source file."""
+    characters = []
+    start_chars = content.find('window.CHARACTERS = [')
+    if start_chars != -1:
+        # Only the roster: achievements and shop items elsewhere have id/name pairs too
+        end_chars = content.find('];', start_chars)
+        characters = re.findall(r"id:'([^']*)'[^}]*name:'([^']*)'", content[start_chars:end_chars])
+    return {
+        "characters": characters,
+        "game_modes": re.findall(r"{'mode':'([^']*)'[^}]*'desc':'([^']*)'", content),
+        "functions": [func for func in SCORING_FUNCTIONS if f"function {func}" in content],
+        "features": [f for f in AUDIO_FUNCTIONS + MOBILE_FEATURES + HARDENING_FEATURES if f in content],
+        "error_counts": {pattern: len(re.findall(pattern, content)) for pattern in ERROR_PATTERNS},
+        "preseed": preseeded_geometry(content),
+    }
 
-print(f"Total characters: {len(characters)}")
+def merge_facts(results: list[dict]) -> dict:
+    """Union of per-file facts; characters and modes keep the first definition of each id."""
+    characters, game_modes = {}, {}
+    for facts in results:
+        for char_id, char_name in facts["characters"]:
+            characters.setdefault(char_id, char_name)
+        for mode, desc in facts["game_modes"]:
+            game_modes.setdefault(mode, desc)
+    return {
+        "characters": list(characters.items()),
+        "game_modes": list(game_modes.items()),
+        "functions": {func for facts in results for func in facts["functions"]},
+        "features": {f for facts in results for f in facts["features"]},
+        "error_counts": {pattern: sum(facts["error_counts"][pattern] for facts in results)
+                         for pattern in ERROR_PATTERNS},
+        "preseed": {path: size for facts in results for path, size in facts["preseed"].items()},
+    }
 
-# 2. Test sprite files
-print("\n🎭 SPRITE VERIFICATION:")
-import os
-missing_sprites = []
-available_sprites = []
-
-for char_id, char_name in characters:
-    if char_id == 'player1':
-        # Check legacy sprites
-        legacy_files = ['player-retro-backswing.png', 'player-retro-run.png', 
-                       'opponent-retro-frontswing.png', 'opponent-retro-run.png',
-                       'player-idle-v2.png', 'opponent-idle-v2.png']
-        
-        for file in legacy_files:
-            if os.path.exists(file):
-                available_sprites.append(f"player1: {file}")
-            else:
-                missing_sprites.append(f"player1: {file}")
+def check_sprites(characters: list[tuple[str, str]],
+                  expected: dict[str, list[int]]) -> tuple[list[str], list[str], list[str]]:
+    """Available/missing sprites per character, plus preseeded sheets whose size is off."""
+    wanted = []
+    for char_id, char_name in characters:
+        if char_id == 'player1':
+            # Check legacy sprites
+            legacy_files = ['player-retro-backswing.png', 'player-retro-run.png',
+                            'opponent-retro-frontswing.png', 'opponent-retro-run.png',
+                            'player-idle-v2.png', 'opponent-idle-v2.png']
+            wanted += [(f"player1: {file}", file) for file in legacy_files]
+        else:
+            # Check sprites-v2 files
+            required_files = ['back-swing.png', 'back-run.png', 'front-swing.png', 'front-run.png']
+            wanted += [(f"{char_id}: {file}", f"sprites-v2/characters/{char_id}-{file}") for file in required_files]
+
+    # One directory listing and one 24-byte header read per sprite, instead of a stat per name
+    index = index_sprites({os.path.dirname(path) for _, path in wanted} | {os.path.dirname(path) for path in expected})
+    available_sprites = [label for label, path in wanted if path in index]
+    missing_sprites = [label for label, path in wanted if path not in index]
+    return available_sprites, missing_sprites, geometry_mismatches(expected, index)
+
+def report(facts: dict):
+    # 1. Test character availability
+    print("\n👥 CHARACTERS:")
+    characters = facts["characters"]
+    for char_id, char_name in characters:
+        print(f"  ✅ {char_id}: {char_name}")
+
+    print(f"Total characters: {len(characters)}")
+
+    # 2. Test sprite files
+    print("\n🎭 SPRITE VERIFICATION:")
+    available_sprites, missing_sprites, wrong_size = check_sprites(characters, facts["preseed"])
+
+    print(f"  ✅ Available sprites: {len(available_sprites)}")
+    print(f"  ❌ Missing sprites: {len(missing_sprites)}")
+
+    if missing_sprites[:5]:  # Show first 5 missing
+        print("  Missing files (first 5):")
+        for missing in missing_sprites[:5]:
+            print(f"    - {missing}")
+
+    if facts["preseed"]:
+        print(f"  📐 Size mismatches vs preseedSpriteCache: {len(wrong_size)}")
+        for problem in wrong_size[:5]:
+            print(f"    - {problem}")
+
+    # 3. Test game modes
+    print("\n🎮 GAME MODES:")
+    game_modes = facts["game_modes"]
+    for mode, desc in game_modes:
+        print(f"  ✅ {mode}: {desc}")
+
+    print(f"Total game modes: {len(game_modes)}")
+
+    # 4. Test scoring system
+    print("\n📊 SCORING SYSTEM:")
+    found_functions = []
+    for func in SCORING_FUNCTIONS:
+        if func in facts["functions"]:
+            found_functions.append(func)
+            print(f"  ✅ {func}")
+        else:
+            print(f"  ❌ {func} - NOT FOUND")
+
+    # 5. Test audio system
+    print("\n🔊 AUDIO SYSTEM:")
+    for func in AUDIO_FUNCTIONS:
+        if func in facts["features"]:
+            print(f"  ✅ {func} detected")
+        else:
+            print(f"  ❌ {func} - NOT FOUND")
+
+    # 6. Test mobile optimizations
+    print("\n📱 MOBILE OPTIMIZATIONS:")
+    mobile_found = []
+    for feature in MOBILE_FEATURES:
+        if feature in facts["features"]:
+            mobile_found.append(feature)
+            print(f"  ✅ {feature}")
+
+    # 7. Test production hardening
+    print("\n🛡️ PRODUCTION HARDENING:")
+    hardening_found = []
+    for feature in HARDENING_FEATURES:
+        if feature in facts["features"]:
+            hardening_found.append(feature)
+            print(f"  ✅ {feature}")
+        else:
+            print(f"  ❌ {feature} - NOT FOUND")
+
+    # 8. Test error handling
+    print("\n🚨 ERROR HANDLING:")
+    error_counts = facts["error_counts"]
+    for pattern in ERROR_PATTERNS:
+        print(f"  📊 {pattern}: {error_counts[pattern]} occurrences")
+
+    # 9. Generate test report
+    print("\n📋 COMPREHENSIVE TEST REPORT:")
+    print("=" * 50)
+
+    total_score = 0
+    max_score = 0
+
+    # Characters (10 points)
+    max_score += 10
+    if len(characters) >= 10:
+        total_score += 10
+        print("  ✅ Characters: EXCELLENT (10/10)")
+    else:
+        score = min(len(characters), 10)
+        total_score += score
+        print(f"  ⚠️ Characters: OK ({score}/10)")
+
+    # Sprites (15 points)
+    max_score += 15
+    sprite_score = max(0, 15 - len(missing_sprites) - len(wrong_size))
+    total_score += sprite_score
+    if sprite_score >= 13:
+        print(f"  ✅ Sprites: EXCELLENT ({sprite_score}/15)")
+    else:
+        print(f"  ⚠️ Sprites: NEEDS ATTENTION ({sprite_score}/15)")
+
+    # Game modes (10 points)
+    max_score += 10
+    if len(game_modes) >= 3:
+        total_score += 10
+        print("  ✅ Game Modes: EXCELLENT (10/10)")
     else:
-        # Check sprites-v2 files
-        required_files = ['back-swing.png', 'back-run.png', 'front-swing.png', 'front-run.png']
-        for file in required_files:
-            path = f"sprites-v2/characters/{char_id}-{file}"
-            if os.path.exists(path):
-                available_sprites.append(f"{char_id}: {file}")
-            else:
-                missing_sprites.append(f"{char_id}: {file}")
-
-print(f"  ✅ Available sprites: {len(available_sprites)}")
-print(f"  ❌ Missing sprites: {len(missing_sprites)}")
-
-if missing_sprites[:5]:  # Show first 5 missing
-    print("  Missing files (first 5):")
-    for missing in missing_sprites[:5]:
-        print(f"    - {missing}")
-
-# 3. Test game modes
-print("\n🎮 GAME MODES:")
-game_modes = re.findall(r"{'mode':'([^']*)'[^}]*'desc':'([^']*)'", content)
-for mode, desc in game_modes:
-    print(f"  ✅ {mode}: {desc}")
-
-print(f"Total game modes: {len(game_modes)}")
-
-# 4. Test scoring system
-print("\n📊 SCORING SYSTEM:")
-scoring_functions = ['updateScore', 'checkGameWin', 'checkSetWin', 'checkMatchWin', 'getTiebreakServer']
-found_functions = []
-for func in scoring_functions:
-    if f"function {func}" in content:
-        found_functions.append(func)
-        print(f"  ✅ {func}")
+        score = len(game_modes) * 3
+        total_score += score
+        print(f"  ⚠️ Game Modes: OK ({score}/10)")
+
+    # Scoring system (15 points)
+    max_score += 15
+    scoring_score = len(found_functions) * 3
+    total_score += scoring_score
+    if scoring_score >= 13:
+        print(f"  ✅ Scoring: EXCELLENT ({scoring_score}/15)")
+    else:
+        print(f"  ⚠️ Scoring: NEEDS ATTENTION ({scoring_score}/15)")
+
+    # Mobile optimization (10 points)
+    max_score += 10
+    mobile_score = min(len(mobile_found) * 2, 10)
+    total_score += mobile_score
+    if mobile_score >= 8:
+        print(f"  ✅ Mobile: EXCELLENT ({mobile_score}/10)")
+    else:
+        print(f"  ⚠️ Mobile: OK ({mobile_score}/10)")
+
+    # Production hardening (20 points)
+    max_score += 20
+    hardening_score = min(len(hardening_found) * 4, 20)
+    total_score += hardening_score
+    if hardening_score >= 16:
+        print(f"  ✅ Hardening: EXCELLENT ({hardening_score}/20)")
     else:
-        print(f"  ❌ {func} - NOT FOUND")
-
-# 5. Test audio system
-print("\n🔊 AUDIO SYSTEM:")
-audio_functions = ['playTone', 'AudioManager', 'safePlaySound']
-for func in audio_functions:
-    if func in content:
-        print(f"  ✅ {func} detected")
+        print(f"  ⚠️ Hardening: NEEDS WORK ({hardening_score}/20)")
+
+    # Error handling (10 points)
+    max_score += 10
+    if error_counts.get('try {', 0) >= 5 and error_counts.get('catch', 0) >= 5:
+        total_score += 10
+        print("  ✅ Error Handling: EXCELLENT (10/10)")
     else:
-        print(f"  ❌ {func} - NOT FOUND")
-
-# 6. Test mobile optimizations
-print("\n📱 MOBILE OPTIMIZATIONS:")
-mobile_features = ['touch', 'viewport', 'MobileEnhancer', 'mobileVibrate', 'user-scalable=no']
-mobile_found = []
-for feature in mobile_features:
-    if feature in content:
-        mobile_found.append(feature)
-        print(f"  ✅ {feature}")
-
-# 7. Test production hardening
-print("\n🛡️ PRODUCTION HARDENING:")
-hardening_features = ['safeGetElement', 'ErrorRecovery', 'LoadingManager', 'PerformanceOptimizer', 'validateCriticalState']
-hardening_found = []
-for feature in hardening_features:
-    if feature in content:
-        hardening_found.append(feature)
-        print(f"  ✅ {feature}")
+        score = min((error_counts.get('try {', 0) + error_counts.get('catch', 0)) // 2, 10)
+        total_score += score
+        print(f"  ⚠️ Error Handling: OK ({score}/10)")
+
+    # Final score
+    percentage = (total_score / max_score) * 100
+    print("=" * 50)
+    print(f"🏆 FINAL SCORE: {total_score}/{max_score} ({percentage:.1f}%)")
+
+    if percentage >= 95:
+        grade = "A+ 🌟 TOURNAMENT READY"
+    elif percentage >= 90:
+        grade = "A 🏆 PRODUCTION READY"
+    elif percentage >= 80:
+        grade = "B+ ✅ GOOD QUALITY"
+    elif percentage >= 70:
+        grade = "B ⚠️ NEEDS POLISH"
     else:
-        print(f"  ❌ {feature} - NOT FOUND")
-
-# 8. Test error handling
-print("\n🚨 ERROR HANDLING:")
-error_patterns = ['try {', 'catch', 'console.error', 'console.warn']
-error_counts = {}
-for pattern in error_patterns:
-    count = len(re.findall(pattern, content))
-    error_counts[pattern] = count
-    print(f"  📊 {pattern}: {count} occurrences")
-
-# 9. Generate test report
-print("\n📋 COMPREHENSIVE TEST REPORT:")
-print("=" * 50)
-
-total_score = 0
-max_score = 0
-
-# Characters (10 points)
-max_score += 10
-if len(characters) >= 10:
-    total_score += 10
-    print("  ✅ Characters: EXCELLENT (10/10)")
-else:
-    score = min(len(characters), 10)
-    total_score += score
-    print(f"  ⚠️ Characters: OK ({score}/10)")
-
-# Sprites (15 points)
-max_score += 15
-sprite_score = max(0, 15 - len(missing_sprites))
-total_score += sprite_score
-if sprite_score >= 13:
-    print(f"  ✅ Sprites: EXCELLENT ({sprite_score}/15)")
-else:
-    print(f"  ⚠️ Sprites: NEEDS ATTENTION ({sprite_score}/15)")
-
-# Game modes (10 points)
-max_score += 10
-if len(game_modes) >= 3:
-    total_score += 10
-    print("  ✅ Game Modes: EXCELLENT (10/10)")
-else:
-    score = len(game_modes) * 3
-    total_score += score
-    print(f"  ⚠️ Game Modes: OK ({score}/10)")
-
-# Scoring system (15 points)
-max_score += 15
-scoring_score = len(found_functions) * 3
-total_score += scoring_score
-if scoring_score >= 13:
-    print(f"  ✅ Scoring: EXCELLENT ({scoring_score}/15)")
-else:
-    print(f"  ⚠️ Scoring: NEEDS ATTENTION ({scoring_score}/15)")
-
-# Mobile optimization (10 points)
-max_score += 10
-mobile_score = min(len(mobile_found) * 2, 10)
-total_score += mobile_score
-if mobile_score >= 8:
-    print(f"  ✅ Mobile: EXCELLENT ({mobile_score}/10)")
-else:
-    print(f"  ⚠️ Mobile: OK ({mobile_score}/10)")
-
-# Production hardening (20 points)
-max_score += 20
-hardening_score = min(len(hardening_found) * 4, 20)
-total_score += hardening_score
-if hardening_score >= 16:
-    print(f"  ✅ Hardening: EXCELLENT ({hardening_score}/20)")
-else:
-    print(f"  ⚠️ Hardening: NEEDS WORK ({hardening_score}/20)")
-
-# Error handling (10 points)
-max_score += 10
-if error_counts.get('try {', 0) >= 5 and error_counts.get('catch', 0) >= 5:
-    total_score += 10
-    print("  ✅ Error Handling: EXCELLENT (10/10)")
-else:
-    score = min((error_counts.get('try {', 0) + error_counts.get('catch', 0)) // 2, 10)
-    total_score += score
-    print(f"  ⚠️ Error Handling: OK ({score}/10)")
-
-# Final score
-percentage = (total_score / max_score) * 100
-print("=" * 50)
-print(f"🏆 FINAL SCORE: {total_score}/{max_score} ({percentage:.1f}%)")
-
-if percentage >= 95:
-    grade = "A+ 🌟 TOURNAMENT READY"
-elif percentage >= 90:
-    grade = "A 🏆 PRODUCTION READY"
-elif percentage >= 80:
-    grade = "B+ ✅ GOOD QUALITY"
-elif percentage >= 70:
-    grade = "B ⚠️ NEEDS POLISH"
-else:
-    grade = "C ❌ NEEDS WORK"
-
-print(f"📊 GRADE: {grade}")
-
-# Recommendations
-print("\n💡 RECOMMENDATIONS:")
-if len(missing_sprites) > 0:
-    print("  🎭 Fix missing sprites for complete character roster")
-if len(found_functions) < len(scoring_functions):
-    print("  📊 Verify all scoring functions are implemented")
-if len(hardening_found) < len(hardening_features):
-    print("  🛡️ Add remaining production hardening features")
-
-print("\n🎮 Championship Tennis analysis complete!")
\ No newline at end of file
+        grade = "C ❌ NEEDS WORK"
+
+    print(f"📊 GRADE: {grade}")
+
+    # Recommendations
+    print("\n💡 RECOMMENDATIONS:")
+    if len(missing_sprites) > 0:
+        print("  🎭 Fix missing sprites for complete character roster")
+    if wrong_size:
+        print("  📐 Re-export sprites whose size doesn't match preseedSpriteCache (640x96 sheets, 80x96 singles)")
+    if len(found_functions) < len(SCORING_FUNCTIONS):
+        print("  📊 Verify all scoring functions are implemented")
+    if len(hardening_found) < len(HARDENING_FEATURES):
+        print("  🛡️ Add remaining production hardening features")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Test Championship Tennis game modes and features.")
+    parser.add_argument("sources", nargs="*", help="files, directories or globs (default: every .html/.js here)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help=f"ignore and don't update {DEFAULT_CACHE}")
+    args = parser.parse_args(argv)
+
+    paths = find_sources(args.sources)
+    missing = [p for p in paths if not p.is_file()]
+    if missing or not paths:
+        print(f"No such source file: {', '.join(map(str, missing)) or args.sources}", file=sys.stderr)
+        return 1
+    cache = None if args.no_cache else SourceCache()
+    results = analyze_files(paths, mode_facts, args.jobs, cache, deps=[Path(sprite_geometry.__file__)])
+
+    print("🧪 Testing Championship Tennis game modes and features...")
+    if len(paths) > 1:
+        cached = f" ({cache.hits} unchanged)" if cache and cache.hits else ""
+        print(f"📂 {len(paths)} files{cached}: {', '.join(str(p) for p in paths)}")
+    report(merge_facts(list(results.values())))
+
+    print("\n🎮 Championship Tennis analysis complete!")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
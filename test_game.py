@@ -1,127 +1,108 @@
 #!/usr/bin/env python3
-import re
-
-# Read the HTML file
-with open('index.html', 'r') as f:
-    content = f.read()
-
-print("🕵️ Analyzing Championship Tennis for potential issues...")
-
-# Check for common JavaScript errors
-issues = []
-
-# 1. Check for undefined variables
-undefined_vars = []
-# Look for variables used but not declared
-var_uses = re.findall(r'\b([a-zA-Z_$][a-zA-Z0-9_$]*)\s*[=\.\[()]', content)
-var_declarations = re.findall(r'(?:var|let|const)\s+([a-zA-Z_$][a-zA-Z0-9_$]*)', content)
-function_declarations = re.findall(r'function\s+([a-zA-Z_$][a-zA-Z0-9_$]*)', content)
-
-# Common globals that are okay
-known_globals = {'window', 'document', 'console', 'setTimeout', 'clearTimeout', 'setInterval', 
-                'clearInterval', 'Math', 'Date', 'Image', 'localStorage', 'navigator',
-                'screen', 'performance', 'requestAnimationFrame', 'location', 'history',
-                'XMLHttpRequest', 'fetch', 'URL', 'URLSearchParams', 'JSON', 'Promise',
-                'Array', 'Object', 'String', 'Number', 'Boolean', 'RegExp', 'Error',
-                'parseInt', 'parseFloat', 'isNaN', 'isFinite', 'encodeURIComponent', 'decodeURIComponent'}
-
-# 2. Check for potential null reference errors
-null_refs = re.findall(r'\.([a-zA-Z_$][a-zA-Z0-9_$]*)\s*(?:\(|\[|\s*=)', content)
-
-# 3. Check for inconsistent timer usage
-timers = re.findall(r'(setTimeout|setInterval)\s*\([^,)]+,\s*(\d+)', content)
-
-# 4. Check for potential memory leaks (event listeners without removal)
-event_listeners = re.findall(r'addEventListener\s*\(\s*[\'"]([^\'"]+)', content)
-event_removals = re.findall(r'removeEventListener\s*\(\s*[\'"]([^\'"]+)', content)
-
-# 5. Check for hardcoded values that might be problematic
-hardcoded_checks = [
-    ('Fixed delays', re.findall(r'setTimeout[^,]*,\s*(\d{3,})', content)),
-    ('Magic numbers in calculations', re.findall(r'[*+\-/]\s*(\d{2,})', content)),
-    ('Hardcoded URLs', re.findall(r'https?://[^\s\'"]+', content))
-]
-
-print("\n🔍 Potential Issues Found:")
-
-# Check for common error patterns
-error_patterns = [
-    (r'getElementById\([^)]*\)\.[a-zA-Z]', 'Potential null reference: getElementById without null check'),
-    (r'\.length\s*-\s*1\s*\](?!\s*[><=])', 'Array access without bounds check'),
-    (r'parseInt\([^,)]+\)', 'parseInt without radix parameter'),
-    (r'==\s*null', 'Use === for null comparison'),
-    (r'!=\s*null', 'Use !== for null comparison'),
-    (r'\.src\s*=\s*[\'"][^\'\"]*[\'"]', 'Direct image src assignment (check for loading errors)'),
-    (r'Math\.random\(\)\s*\*\s*\d+(?!\s*[.,)])', 'Math.random() scaling without Math.floor'),
-]
-
-found_patterns = []
-for pattern, description in error_patterns:
-    matches = re.findall(pattern, content)
-    if matches:
-        found_patterns.append((description, len(matches)))
-
-if found_patterns:
-    for desc, count in found_patterns:
-        print(f"  ⚠️ {desc} ({count} occurrences)")
-
-# Check for specific game logic issues
-print("\n🎮 Game-Specific Checks:")
-
-# Check scoring logic
-scoring_keywords = ['score', 'point', 'game', 'set', 'match', 'deuce', 'advantage']
-for keyword in scoring_keywords:
-    matches = re.findall(f'{keyword}[A-Za-z]*\s*[=+\-]', content, re.IGNORECASE)
-    if matches:
-        print(f"  📊 {keyword.title()} operations: {len(matches)}")
-
-# Check physics calculations
-physics_checks = ['velocity', 'position', 'bounce', 'gravity', 'friction']
-for check in physics_checks:
-    matches = re.findall(f'{check}[A-Za-z]*\s*[=+\-*]', content, re.IGNORECASE)
-    if matches:
-        print(f"  🏀 {check.title()} calculations: {len(matches)}")
-
-# Check for sprite animation logic
-sprite_checks = ['sprite', 'animation', 'frame']
-for check in sprite_checks:
-    matches = re.findall(f'{check}[A-Za-z]*\s*[=.]', content, re.IGNORECASE)
-    if matches:
-        print(f"  🎭 {check.title()} operations: {len(matches)}")
-
-print("\n📈 Performance Considerations:")
-
-# Check for performance issues
-perf_issues = []
-if 'setInterval' in content:
-    intervals = len(re.findall(r'setInterval', content))
-    print(f"  ⏱️ setInterval calls: {intervals} (check if all are cleared)")
-
-if 'getBoundingClientRect' in content:
-    rect_calls = len(re.findall(r'getBoundingClientRect', content))
-    print(f"  📏 getBoundingClientRect calls: {rect_calls} (expensive in loops)")
-
-if 'querySelector' in content:
-    query_calls = len(re.findall(r'querySelector', content))
-    print(f"  🔍 DOM queries: {query_calls} (cache frequently used elements)")
-
-# Check for mobile optimizations
-mobile_features = ['touch', 'pointer', 'orientation', 'viewport', 'devicePixelRatio']
-mobile_found = []
-for feature in mobile_features:
-    if feature in content.lower():
-        mobile_found.append(feature)
-
-print(f"\n📱 Mobile Features Detected: {', '.join(mobile_found) if mobile_found else 'None'}")
-
-# Check for error handling
-error_handling = ['try', 'catch', 'finally', 'throw', 'Error']
-error_found = []
-for eh in error_handling:
-    count = len(re.findall(f'\\b{eh}\\b', content))
-    if count > 0:
-        error_found.append(f"{eh}({count})")
-
-print(f"🚨 Error Handling: {', '.join(error_found) if error_found else 'No explicit error handling found'}")
-
-print("\n✅ Analysis complete! Check the items above for potential improvements.")
\ No newline at end of file
+"""
+Static checks for Championship Tennis sources.
+
+Each file is read once and walked once by source_scan.scan_source; every
+count below comes from that single pass. Files are scanned in parallel and
+the counts summed into one report. Defaults to every .html/.js here.
+Per-file facts are cached by content hash in .source-cache.json, so only
+edited files are rescanned; the cross-file checks run on the merged facts.
+
+Usage:
+    test_game.py
+    test_game.py index.html game.js minigames.js
+    test_game.py 'index*.html' --per-file
+"""
+
+import argparse
+import sys
+
+from source_cache import DEFAULT_CACHE, SourceCache
+from source_scan import ERROR_PATTERNS, analyze_files, cross_file_checks, extract_facts, find_sources, merge_stats
+
+# How many sites to list per cross-file finding
+SHOW = 5
+
+def print_report(stats: dict):
+    print("\n🔍 Potential Issues Found:")
+    for key, description in ERROR_PATTERNS.items():
+        if stats["errors"][key]:
+            print(f"  ⚠️ {description} ({stats['errors'][key]} occurrences)")
+
+    print("\n🎮 Game-Specific Checks:")
+    for group, icon, label in (("scoring", "📊", "operations"), ("physics", "🏀", "calculations"),
+                               ("sprite", "🎭", "operations")):
+        for keyword, count in stats["keywords"][group].items():
+            if count:
+                print(f"  {icon} {keyword.title()} {label}: {count}")
+
+    print("\n📈 Performance Considerations:")
+    perf = stats["perf"]
+    if perf["setInterval"]:
+        print(f"  ⏱️ setInterval calls: {perf['setInterval']} (check if all are cleared)")
+    if perf["getBoundingClientRect"]:
+        print(f"  📏 getBoundingClientRect calls: {perf['getBoundingClientRect']} (expensive in loops)")
+    if perf["querySelector"]:
+        print(f"  🔍 DOM queries: {perf['querySelector']} (cache frequently used elements)")
+
+    mobile = stats["mobile"]
+    print(f"\n📱 Mobile Features Detected: {', '.join(mobile) if mobile else 'None'}")
+
+    error_found = [f"{name}({count})" for name, count in stats["error_handling"].items() if count]
+    print(f"🚨 Error Handling: {', '.join(error_found) if error_found else 'No explicit error handling found'}")
+
+def print_cross_file(checks: dict):
+    print("\n🔗 Cross-file Checks:")
+    for key, label in (("duplicate_functions", "Functions defined more than once"),
+                       ("shared_globals", "Globals declared or assigned in several places")):
+        found = checks[key]
+        if found:
+            print(f"  ♻️ {label}: {len(found)}")
+            for name, sites in list(found.items())[:SHOW]:
+                print(f"    - {name}: {', '.join(sites)}")
+    timers = checks["timers"]
+    print(f"  ⏱️ Timers: setInterval {timers['setInterval']} / clearInterval {timers['clearInterval']}, "
+          f"setTimeout {timers['setTimeout']} / clearTimeout {timers['clearTimeout']}, "
+          f"requestAnimationFrame {timers['requestAnimationFrame']} / cancelAnimationFrame {timers['cancelAnimationFrame']}")
+    if checks["unremoved_listeners"]:
+        events = ", ".join(f"{event}({n})" for event, n in checks["unremoved_listeners"].items())
+        print(f"  👂 Listeners never removed anywhere: {events}")
+    missing = checks["missing_sprites"]
+    print(f"  🖼️ Image references not found on disk: {len(missing) or 'None'}")
+    for site in missing[:SHOW]:
+        print(f"    - {site}")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Static checks for Championship Tennis sources.")
+    parser.add_argument("sources", nargs="*", help="files, directories or globs (default: every .html/.js here)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--per-file", action="store_true", help="also print a report for each file")
+    parser.add_argument("--no-cache", action="store_true", help=f"ignore and don't update {DEFAULT_CACHE}")
+    args = parser.parse_args(argv)
+
+    paths = find_sources(args.sources)
+    missing = [p for p in paths if not p.is_file()]
+    if missing or not paths:
+        print(f"No such source file: {', '.join(map(str, missing)) or args.sources}", file=sys.stderr)
+        return 1
+    cache = None if args.no_cache else SourceCache()
+    facts = analyze_files(paths, extract_facts, args.jobs, cache)
+
+    print("🕵️ Analyzing Championship Tennis for potential issues...")
+    if len(paths) > 1:
+        cached = f" ({cache.hits} unchanged)" if cache and cache.hits else ""
+        print(f"📂 {len(paths)} files{cached}: {', '.join(str(p) for p in paths)}")
+        if args.per_file:
+            for path, f in facts.items():
+                print(f"\n📄 {path}")
+                print_report(f["stats"])
+            print("\n📄 All files")
+    print_report(merge_stats([f["stats"] for f in facts.values()]))
+    if len(paths) > 1:
+        print_cross_file(cross_file_checks(facts))
+
+    print("\n✅ Analysis complete! Check the items above for potential improvements.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
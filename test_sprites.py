@@ -1,81 +1,135 @@
 #!/usr/bin/env python3
+"""
+Cross-check the character roster against sprites-v2/characters/.
+
+Characters are collected from window.CHARACTERS in every source given
+(default: every .html/.js here, scanned in a process pool, unchanged files
+served from .source-cache.json) and merged. Sprite files are listed once per
+directory and their PNG headers checked against the sizes game.js assumes
+in preseedSpriteCache.
+
+Usage:
+    test_sprites.py
+    test_sprites.py game.js
+"""
+
+import argparse
 import os
+import re
+import sys
+from pathlib import Path
+
+import sprite_geometry
+from source_cache import DEFAULT_CACHE, SourceCache
+from source_scan import analyze_files, find_sources
+from sprite_geometry import geometry_mismatches, index_sprites, preseeded_geometry
+
+SPRITE_DIR = 'sprites-v2/characters'
+
+def sprite_facts(content: str) -> dict:
+    """Character ids declared in window.CHARACTERS and the sizes preseedSpriteCache assumes."""
+    characters = []
+    start_chars = content.find('window.CHARACTERS = [')
+    if start_chars != -1:
+        end_chars = content.find('];', start_chars)
+        char_section = content[start_chars:end_chars]
+        characters = re.findall(r"id:'([^']*)'", char_section)
+    return {"characters": characters, "preseed": preseeded_geometry(content)}
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Cross-check characters against sprite files.")
+    parser.add_argument("sources", nargs="*", help="files, directories or globs (default: every .html/.js here)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help=f"ignore and don't update {DEFAULT_CACHE}")
+    args = parser.parse_args(argv)
+
+    paths = find_sources(args.sources)
+    missing_sources = [p for p in paths if not p.is_file()]
+    if missing_sources or not paths:
+        print(f"No such source file: {', '.join(map(str, missing_sources)) or args.sources}", file=sys.stderr)
+        return 1
+    cache = None if args.no_cache else SourceCache()
+    results = analyze_files(paths, sprite_facts, args.jobs, cache, deps=[Path(sprite_geometry.__file__)])
+    characters = list(dict.fromkeys(char for facts in results.values() for char in facts["characters"]))
+    expected = {path: size for facts in results.values() for path, size in facts["preseed"].items()}
+    # One listing per directory, PNG headers only: sizes without decoding any image
+    index = index_sprites({SPRITE_DIR} | {os.path.dirname(path) for path in expected})
+
+    print("🎾 Characters defined in game:")
+    for char in characters:
+        print(f"  - {char}")
+
+    print("\n🗂️ Sprite files available in sprites-v2/characters/:")
+    sprite_files = {}
+    for path in index:
+        if path.startswith(f'{SPRITE_DIR}/'):
+            file = path[len(SPRITE_DIR) + 1:]
+            parts = file.split('-')
+            if len(parts) >= 3:  # e.g., player4-back-swing.png
+                char_id = parts[0]
+                view = parts[1]  # back or front
+                action = parts[2].replace('.png', '')  # swing or run
+
+                if char_id not in sprite_files:
+                    sprite_files[char_id] = {}
+                if view not in sprite_files[char_id]:
+                    sprite_files[char_id][view] = []
+                sprite_files[char_id][view].append(action)
+
+    for char_id, views in sprite_files.items():
+        print(f"  - {char_id}: {views}")
+
+    print("\n⚠️ Missing sprite files:")
+    missing = []
+    for char in characters:
+        if char == 'player1':
+            # player1 uses legacy sprites in root directory
+            continue
+
+        if char not in sprite_files:
+            missing.append(f"{char}: No sprite files found")
+            continue
+
+        required = ['back-swing.png', 'back-run.png', 'front-swing.png', 'front-run.png']
+        for req in required:
+            path = f"{SPRITE_DIR}/{char}-{req}"
+            if path not in index:
+                missing.append(f"{char}: Missing {req}")
+
+    if missing:
+        for miss in missing:
+            print(f"  - {miss}")
+    else:
+        print("  ✅ All required sprite files present!")
+
+    # Check for orphaned sprite files (characters not in game)
+    orphaned = []
+    for char_id in sprite_files:
+        if char_id not in characters and char_id != 'player1':
+            orphaned.append(char_id)
+
+    if orphaned:
+        print("\n🧩 Orphaned sprite files (characters not defined in game):")
+        for orphan in orphaned:
+            print(f"  - {orphan}")
+
+    wrong_size = geometry_mismatches(expected, index)
+    if expected:
+        print(f"\n📐 Sprite sizes vs preseedSpriteCache ({len(expected)} preseeded):")
+        if wrong_size:
+            for problem in wrong_size:
+                print(f"  - {problem}")
+        else:
+            print("  ✅ Every preseeded sprite on disk has the size game.js assumes")
+
+    print(f"\n📊 Summary:")
+    print(f"  Characters in game: {len(characters)}")
+    print(f"  Character sprites available: {len(sprite_files)}")
+    print(f"  Missing sprites: {len(missing)}")
+    print(f"  Orphaned sprites: {len(orphaned)}")
+    if expected:
+        print(f"  Size mismatches: {len(wrong_size)}")
+    return 0
 
-# Read the HTML file to extract character definitions
-with open('index.html', 'r') as f:
-    content = f.read()
-
-# Extract character IDs from the HTML
-characters = []
-start_chars = content.find('window.CHARACTERS = [')
-if start_chars != -1:
-    end_chars = content.find('];', start_chars)
-    char_section = content[start_chars:end_chars]
-    
-    # Find all id: patterns
-    import re
-    ids = re.findall(r"id:'([^']*)'", char_section)
-    characters = ids
-
-print("🎾 Characters defined in game:")
-for char in characters:
-    print(f"  - {char}")
-
-print("\n🗂️ Sprite files available in sprites-v2/characters/:")
-sprite_files = {}
-for file in os.listdir('sprites-v2/characters/'):
-    if file.endswith('.png'):
-        parts = file.split('-')
-        if len(parts) >= 3:  # e.g., player4-back-swing.png
-            char_id = parts[0]
-            view = parts[1]  # back or front
-            action = parts[2].replace('.png', '')  # swing or run
-            
-            if char_id not in sprite_files:
-                sprite_files[char_id] = {}
-            if view not in sprite_files[char_id]:
-                sprite_files[char_id][view] = []
-            sprite_files[char_id][view].append(action)
-
-for char_id, views in sprite_files.items():
-    print(f"  - {char_id}: {views}")
-
-print("\n⚠️ Missing sprite files:")
-missing = []
-for char in characters:
-    if char == 'player1':
-        # player1 uses legacy sprites in root directory
-        continue
-    
-    if char not in sprite_files:
-        missing.append(f"{char}: No sprite files found")
-        continue
-    
-    required = ['back-swing.png', 'back-run.png', 'front-swing.png', 'front-run.png']
-    for req in required:
-        path = f"sprites-v2/characters/{char}-{req}"
-        if not os.path.exists(path):
-            missing.append(f"{char}: Missing {req}")
-
-if missing:
-    for miss in missing:
-        print(f"  - {miss}")
-else:
-    print("  ✅ All required sprite files present!")
-
-# Check for orphaned sprite files (characters not in game)
-orphaned = []
-for char_id in sprite_files:
-    if char_id not in characters and char_id != 'player1':
-        orphaned.append(char_id)
-
-if orphaned:
-    print("\n🧩 Orphaned sprite files (characters not defined in game):")
-    for orphan in orphaned:
-        print(f"  - {orphan}")
-
-print(f"\n📊 Summary:")
-print(f"  Characters in game: {len(characters)}")
-print(f"  Character sprites available: {len(sprite_files)}")
-print(f"  Missing sprites: {len(missing)}")
-print(f"  Orphaned sprites: {len(orphaned)}")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())